@@ -1,23 +1,44 @@
 from influxdb import InfluxDBClient
+from influxdb.exceptions import InfluxDBClientError
+
+# Number of measurements per SHOW FIELD KEYS statement when falling back to batches.
+FIELD_KEYS_BATCH_SIZE = 50
 
 def fetch_measurements_and_fields(client):
+    # Fetch the field keys of every measurement in a single round-trip.
+    # Measurement names come from the series names of the response.
+    try:
+        fields_result = client.query('SHOW FIELD KEYS')
+    except InfluxDBClientError:
+        # The response was too large, fetch the field keys in batches instead.
+        return fetch_measurements_and_fields_batched(client)
+
+    # Dictionary to hold measurement and their fields
+    measurements_fields = {}
+    for series in fields_result.raw.get('series', []):
+        measurements_fields[series['name']] = [row[0] for row in series.get('values', [])]
+
+    return measurements_fields
+
+
+def fetch_measurements_and_fields_batched(client, batch_size=FIELD_KEYS_BATCH_SIZE):
     # Fetch measurements
     measurements_query = 'SHOW MEASUREMENTS'
     measurements_result = client.query(measurements_query)
-    measurements = list(measurements_result.get_points())
+    measurement_names = [row[0] for series in measurements_result.raw.get('series', [])
+                         for row in series.get('values', [])]
 
     # Dictionary to hold measurement and their fields
     measurements_fields = {}
 
-    for measurement in measurements:
-        measurement_name = measurement['name']
-        fields_query = f'SHOW FIELD KEYS FROM "{measurement_name}"'
+    for i in range(0, len(measurement_names), batch_size):
+        batch = measurement_names[i:i + batch_size]
+        fields_query = 'SHOW FIELD KEYS FROM ' + ', '.join(f'"{name}"' for name in batch)
         fields_result = client.query(fields_query)
-        fields = list(fields_result.get_points())
 
-        # Collect all fields for the measurement
-        field_names = [field['fieldKey'] for field in fields]
-        measurements_fields[measurement_name] = field_names
+        # Collect all fields for each measurement in the batch
+        for series in fields_result.raw.get('series', []):
+            measurements_fields[series['name']] = [row[0] for row in series.get('values', [])]
 
     return measurements_fields
 
@@ -1,63 +1,164 @@
 
 from influxdb import InfluxDBClient
+from influxdb.resultset import ResultSet
+from requests.adapters import HTTPAdapter
+from schema_cache import load_cached_schema, save_cached_schema
 import pandas as pd
 import pytz
+from datetime import datetime
+from functools import lru_cache
+import threading
+import time
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
+
+try:
+    import async_influx
+except ImportError:
+    async_influx = None
+
+# Number of measurements queried in parallel.
+MAX_WORKERS = 8
+
+# Number of keep-alive HTTP connections held by the client's session.
+HTTP_POOL_SIZE = 32
+
+# Timezone objects are looked up once per name and reused across runs.
+get_timezone = lru_cache(maxsize=8)(pytz.timezone)
+
+# Format of the combined start/end date and time inputs.
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Count query template, filled in once per measurement.
+COUNT_QUERY = 'SELECT COUNT(*) FROM "{measurement}" WHERE vehicle_id=\'{vehicle_id}\' AND time >= {start_ns} AND time < {end_ns}'
+
+# Keeps lines printed by the worker threads from interleaving.
+print_lock = threading.Lock()
+
+def log(*args):
+    with print_lock:
+        print(*args)
+
+def split_time_range(start_ns, end_ns, chunks):
+    """
+    Split [start_ns, end_ns) into `chunks` contiguous sub-ranges of (nearly) equal length.
+    Returns a list of (start_ns, end_ns) pairs.
+    """
+    chunks = max(1, chunks)
+    bounds = [start_ns + (end_ns - start_ns) * i // chunks for i in range(chunks + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
 
 def fetch_measurements_and_fields(client):
     """
-    Retrieve all measurements in the database and, for each, retrieve its field keys.
+    Retrieve all measurements and their field keys with a single SHOW FIELD KEYS query.
     Returns a dictionary where keys are measurement names and values are lists of field keys.
     """
-    # Retrieve all measurements in the database.
-    measurements_query = 'SHOW MEASUREMENTS'
-    measurements_result = client.query(measurements_query)
-    measurements = list(measurements_result.get_points())
+    # Without a FROM clause the result holds one series per measurement.
+    fields_result = client.query('SHOW FIELD KEYS')
 
     measurements_fields = {}
-
-    for measurement in measurements:
-        measurement_name = measurement['name']
-        fields_query = f'SHOW FIELD KEYS FROM "{measurement_name}"'
-        fields_result = client.query(fields_query)
-        fields = list(fields_result.get_points())
-        field_names = [field['fieldKey'] for field in fields]
-        measurements_fields[measurement_name] = field_names
+    for (measurement_name, _), fields in fields_result.items():
+        measurements_fields[measurement_name] = [field['fieldKey'] for field in fields]
 
     return measurements_fields
 
-def get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt):
+def get_counts_for_fields(client, measurement, fields, vehicle_id, start_ns, end_ns):
     """
-    Count non-null entries for a specific field in a measurement given vehicle and time filters.
-    Returns the count value (typically as an integer).
+    Count non-null entries for all fields of a measurement given vehicle and time filters.
+    A single COUNT(*) query returns one "count_<field>" column per field of the measurement.
+    Returns a dictionary of field -> count (0 when the field has no data).
     """
-    # When you use SELECT COUNT("<field>"), InfluxDB returns a column named "count_<field>"
-    query = f'''
-    SELECT COUNT("{field}") 
-    FROM "{measurement}"
-    WHERE vehicle_id='{vehicle_id}' 
-      AND time >= '{start_dt.isoformat()}' 
-      AND time < '{end_dt.isoformat()}'
-    '''
+    query = COUNT_QUERY.format(measurement=measurement, vehicle_id=vehicle_id, start_ns=start_ns, end_ns=end_ns)
     result = client.query(query)
-    # print(result)
-    points = list(result.get_points())
-    print(points)
-    count_column = f'count'
-    if points and count_column in points[0]:
-        # The count value is stored in the 'count_<field>' column.
-        print(points[0][count_column])
-        return points[0][count_column]
-    return 0
+    return read_counts(fields, list(result.get_points()))
+
+def read_counts(fields, points):
+    """
+    Returns a dictionary of field -> count from the "count_<field>" columns of a COUNT(*)
+    result (0 when the field has no data).
+    """
+    return {field: (points[0].get(f"count_{field}") or 0) if points else 0 for field in fields}
+
+def get_counts_async(connection, measurements_fields, vehicle_id, ranges):
+    """
+    Count the fields of all measurements by running one COUNT(*) query per measurement and
+    time range concurrently with aiohttp, holding at most HTTP_POOL_SIZE connections.
+    The counts of the ranges are summed per field, and one line with the total elapsed time is logged.
+    Returns the "Measurement.count_field" keys and the matching counts as two parallel lists.
+    """
+    started = time.perf_counter()
+    measurements = []
+    for measurement, fields in measurements_fields.items():
+        if not fields:
+            log(f"No fields found for measurement: {measurement}")
+            continue
+        measurements.append((measurement, fields))
+    queries = [COUNT_QUERY.format(measurement=measurement, vehicle_id=vehicle_id, start_ns=range_start, end_ns=range_end)
+               for measurement, _ in measurements for range_start, range_end in ranges]
+    raw_results = iter(async_influx.run_queries(connection, queries, HTTP_POOL_SIZE))
+    elapsed = time.perf_counter() - started
+
+    keys, counts = [], []
+    for measurement, fields in measurements:
+        totals = dict.fromkeys(fields, 0)
+        for raw in islice(raw_results, len(ranges)):
+            if isinstance(raw, Exception):
+                raise raw
+            for field, count in read_counts(fields, list(ResultSet(raw).get_points())).items():
+                totals[field] += count
+        log(f"{measurement}: {len(fields)} fields")
+        keys.extend(f"{measurement}.count_{field}" for field in fields)
+        counts.extend(totals[field] for field in fields)
+    # All queries run together, so only the batch as a whole has a meaningful elapsed time.
+    log(f"{len(measurements)} measurements, elapsed={elapsed:.2f}s")
+    return keys, counts
+
+def fetch_measurements_with_series(client, vehicle_id):
+    """
+    Returns the set of measurements that hold at least one series for the vehicle.
+    SHOW SERIES CARDINALITY is answered from the series index without scanning any data,
+    so it does not take the time range into account.
+    """
+    result = client.query(f"SHOW SERIES CARDINALITY WHERE vehicle_id='{vehicle_id}'")
+    return {measurement for (measurement, _), points in result.items() if any(point['count'] for point in points)}
+
+def query_measurement(client, measurement, fields, vehicle_id, start_ns, end_ns):
+    """
+    Count the entries of every field of one measurement, then print one summary line.
+    Returns the "Measurement.count_field" keys and the matching counts as two parallel lists.
+    """
+    # Skip if no fields are found for this measurement.
+    if not fields:
+        log(f"No fields found for measurement: {measurement}")
+        return [], []
+
+    started = time.perf_counter()
+    counts = get_counts_for_fields(client, measurement, fields, vehicle_id, start_ns, end_ns)
+    log(f"{measurement}: {len(fields)} fields, elapsed={time.perf_counter() - started:.2f}s")
+    # Create combined keys such as "Measurement.count_field"
+    keys = [f"{measurement}.count_{field}" for field in fields]
+    return keys, [counts[field] for field in fields]
 
 def main():
+    # Connection parameters, shared by the InfluxDB client and the async count queries.
+    connection = {
+        'host': '104.154.190.81',
+        'port': 15086,
+        'username': 'boson_hmi',
+        'password': 'hmi@boson76$',
+        'database': 'HMI_test'
+    }
+
     # Establish connection with InfluxDB.
-    client = InfluxDBClient(
-        host='104.154.190.81',
-        port=15086,
-        username='boson_hmi',
-        password='hmi@boson76$',
-        database='HMI_test'
-    )
+    client = InfluxDBClient(**connection)
+    # Keep enough connections alive for all worker threads to reuse their sockets.
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=3)
+    client._session.mount('http://', adapter)
+    client._session.mount('https://', adapter)
+    # Ask for gzip-compressed responses to cut the transfer size of large results.
+    client._session.headers['Accept-Encoding'] = 'gzip, deflate'
     
     # Filtering parameters
     vehicle_id = 'VT-Box-T1'
@@ -65,47 +166,70 @@ def main():
     end_date = '2025-01-08'
     start_time = '11:11:59'
     end_time = '12:12:00'
+    # 'count' for exact per-field counts, 'presence' for 1/0 per field from the series index.
+    mode = 'count'
+    # Number of sub-ranges the time range is split into; each is counted by its own query.
+    chunks = 1
     
     # Create timezone-aware timestamps using the Asia/Kolkata timezone.
-    local_tz = pytz.timezone('Asia/Kolkata')
-    start_dt = pd.Timestamp(f'{start_date} {start_time}').tz_localize(local_tz)
-    end_dt   = pd.Timestamp(f'{end_date} {end_time}').tz_localize(local_tz)
-    
-    # Fetch all measurements and their fields.
-    measurements_fields = fetch_measurements_and_fields(client)
+    local_tz = get_timezone('Asia/Kolkata')
+    start_dt = pd.Timestamp(datetime.strptime(f'{start_date} {start_time}', DATETIME_FORMAT), tz=local_tz)
+    end_dt   = pd.Timestamp(datetime.strptime(f'{end_date} {end_time}', DATETIME_FORMAT), tz=local_tz)
+    # Query bounds as nanoseconds since the epoch, the unit InfluxDB stores.
+    start_ns, end_ns = start_dt.value, end_dt.value
+    ranges = split_time_range(start_ns, end_ns, chunks)
     
-    # List to collect all results.
-    results_list = []
+    # Fetch all measurements and their fields, reusing a recently fetched schema if there is one.
+    measurements_fields = load_cached_schema(client._host, client._database)
+    if measurements_fields is None:
+        measurements_fields = fetch_measurements_and_fields(client)
+        save_cached_schema(client._host, client._database, measurements_fields)
     
-    # Loop through each measurement and each field and get the count.
-    for measurement, fields in measurements_fields.items():
-        print(f"Processing Measurement: {measurement}")
-        
-        # Skip if no fields are found for this measurement.
-
-        if not fields:
-            print("  No fields found for this measurement.")
-            continue
-        
-        for field in fields:
-            count_value = get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt)
-            # Create a combined key such as "Measurement.count_field"
-            combined_key = f"{measurement}.count_{field}"
-            # print(f"  {combined_key} -> {count_value}")
-            results_list.append({
-                'Measurement_Field': combined_key,
-                'Count': count_value
-            })
-    
-    # Create one DataFrame with the complete results.
-    df = pd.DataFrame(results_list)
-    
-    if not df.empty:
-        csv_filename = f"measurements_field_counts_{vehicle_id}_{start_date.replace('-', '')}_{start_time.replace(':', '')}_to_{end_time.replace(':', '')}.csv"
-        df.to_csv(csv_filename, index=False)
-        print(f"\nData saved to {csv_filename}")
-    else:
+    if not any(measurements_fields.values()):
         print("No data to save.")
+        return
+
+    # In presence mode every field is reported as 1 when its measurement has series for the
+    # vehicle and 0 otherwise, from a single index lookup instead of COUNT scans.
+    present = fetch_measurements_with_series(client, vehicle_id) if mode == 'presence' else None
+
+    # Write the rows as the counts arrive, so partial results survive an interrupted run.
+    csv_filename = f"measurements_field_counts_{vehicle_id}_{start_date.replace('-', '')}_{start_time.replace(':', '')}_to_{end_time.replace(':', '')}.csv"
+    with open(csv_filename, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['Measurement_Field', 'Count'])
+
+        if present is not None:
+            for measurement, fields in measurements_fields.items():
+                writer.writerows([f"{measurement}.count_{field}", int(measurement in present)] for field in fields)
+        elif async_influx is not None:
+            keys, counts = get_counts_async(connection, measurements_fields, vehicle_id, ranges)
+            writer.writerows(zip(keys, counts))
+        else:
+            # Query every (measurement, time range) pair in parallel. Up to two queries per worker are
+            # kept in flight and consumed in submission order; the next query is submitted as each one
+            # is taken, so its request overlaps the processing of the current result. Once all ranges
+            # of a measurement are in, their counts are summed per field and written.
+            workers = MAX_WORKERS
+            pending = ((measurement, fields, range_start, range_end)
+                       for measurement, fields in measurements_fields.items()
+                       for range_start, range_end in ranges)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                def submit(item):
+                    measurement, fields, range_start, range_end = item
+                    return executor.submit(query_measurement, client, measurement, fields, vehicle_id, range_start, range_end)
+
+                in_flight = deque(map(submit, islice(pending, 2 * workers)))
+                parts = []
+                while in_flight:
+                    future = in_flight.popleft()
+                    in_flight.extend(map(submit, islice(pending, 1)))
+                    parts.append(future.result())
+                    if len(parts) == len(ranges):
+                        keys = parts[0][0]
+                        writer.writerows(zip(keys, map(sum, zip(*(counts for _, counts in parts)))))
+                        parts = []
+    print(f"\nData saved to {csv_filename}")
 
 if __name__ == "__main__":
     main()
@@ -4,8 +4,51 @@ import sys
 import os
 import pandas as pd
 import pytz
+from datetime import datetime
+from functools import lru_cache
 import threading
+import time
+import csv
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
 from influxdb import InfluxDBClient
+from influxdb.resultset import ResultSet
+from requests.adapters import HTTPAdapter
+from schema_cache import load_cached_schema, save_cached_schema
+
+try:
+    import async_influx
+except ImportError:
+    async_influx = None
+
+# Maximum number of COUNT() aggregates combined into a single query.
+MAX_FIELDS_PER_QUERY = 200
+
+# Default number of measurements queried in parallel.
+DEFAULT_WORKERS = 8
+
+# Number of keep-alive HTTP connections held by the client's session.
+HTTP_POOL_SIZE = 32
+
+# Timezone objects are looked up once per name and reused across runs.
+get_timezone = lru_cache(maxsize=8)(pytz.timezone)
+
+# Format of the combined start/end date and time inputs.
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Count query template, filled in once per measurement (or batch of fields).
+COUNT_QUERY = 'SELECT {aggregates} FROM "{measurement}" WHERE vehicle_id=\'{vehicle_id}\' AND time >= {start_ns} AND time < {end_ns}'
+
+# Interval between output box refreshes, in milliseconds.
+LOG_DRAIN_INTERVAL_MS = 50
+
+# Maximum number of queued messages written to the output box per refresh.
+LOG_DRAIN_BATCH = 500
+
+# Queued by a query thread after its last message, so drain_log re-enables the Run button on the Tk main loop.
+RUN_FINISHED = object()
 
 
 # ==================================================
@@ -25,121 +68,230 @@ def load_measurements_fields(filename):
     Returns a dictionary mapping measurement names to lists of field keys.
     """
     measurements_fields = {}
-    current_measurement = None
+    current_fields = None
 
     try:
         with open(filename, 'r') as f:
-            for line in f:
-                stripped_line = line.strip()
-                # Skip blank lines
-                if not stripped_line:
-                    current_measurement = None
-                    continue
-
-                # If the line begins with whitespace and we already have a measurement,
-                # treat it as an additional field.
-                if line[0].isspace() and current_measurement:
-                    field = stripped_line
-                    measurements_fields[current_measurement].append(field)
-                else:
-                    # Otherwise, assume it's the start of a new measurement block.
-                    # Expect at least two parts, measurement name and the first field.
-                    parts = stripped_line.split('\t')
-                    if len(parts) >= 2:
-                        current_measurement = parts[0]
-                        measurements_fields[current_measurement] = [parts[1]]
-                    else:
-                        # In case there is only one part, create an entry with an empty field list.
-                        current_measurement = parts[0]
-                        measurements_fields[current_measurement] = []
+            lines = f.read().split('\n')
+
+        for line in lines:
+            stripped_line = line.strip()
+            # Blank lines end the current block.
+            if not stripped_line:
+                current_fields = None
+                continue
+
+            if current_fields is not None and line[0].isspace():
+                # Indented line inside a block: an additional field.
+                current_fields.append(stripped_line)
+            else:
+                # Start of a new measurement block: the name, optionally followed by the first field.
+                parts = stripped_line.split('\t', 2)
+                current_fields = measurements_fields[parts[0]] = parts[1:2]
     except Exception as e:
         raise Exception(f"Error reading measurements file: {e}")
 
     return measurements_fields
 
+def create_client(params):
+    """
+    Create an InfluxDBClient whose HTTP session keeps up to HTTP_POOL_SIZE connections
+    alive, so the parallel count queries reuse established sockets.
+    Responses are requested gzip-compressed.
+    """
+    client = InfluxDBClient(
+        host=params['host'],
+        port=int(params['port']),
+        username=params['username'],
+        password=params['password'],
+        database=params['database']
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=3)
+    client._session.mount('http://', adapter)
+    client._session.mount('https://', adapter)
+    client._session.headers['Accept-Encoding'] = 'gzip, deflate'
+    return client
+
+def split_time_range(start_ns, end_ns, chunks):
+    """
+    Split [start_ns, end_ns) into `chunks` contiguous sub-ranges of (nearly) equal length.
+    Returns a list of (start_ns, end_ns) pairs.
+    """
+    chunks = max(1, chunks)
+    bounds = [start_ns + (end_ns - start_ns) * i // chunks for i in range(chunks + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
 def fetch_measurements_and_fields(client):
     """
-    Retrieve all measurements and their field keys from InfluxDB.
+    Retrieve all measurements and their field keys with a single SHOW FIELD KEYS query.
     Returns a dictionary where keys are measurement names and values are lists of field keys.
     """
-    measurements_query = 'SHOW MEASUREMENTS'
-    measurements_result = client.query(measurements_query)
-    measurements = list(measurements_result.get_points())
+    # Without a FROM clause the result holds one series per measurement.
+    fields_result = client.query('SHOW FIELD KEYS')
 
     measurements_fields = {}
-    for measurement in measurements:
-        measurement_name = measurement['name']
-        fields_query = f'SHOW FIELD KEYS FROM "{measurement_name}"'
-        fields_result = client.query(fields_query)
-        fields = list(fields_result.get_points())
-        field_names = [field['fieldKey'] for field in fields]
-        measurements_fields[measurement_name] = field_names
+    for (measurement_name, _), fields in fields_result.items():
+        measurements_fields[measurement_name] = [field['fieldKey'] for field in fields]
 
     return measurements_fields
 
-def get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt, output_func):
+def build_count_queries(measurement, fields, vehicle_id, start_ns, end_ns, count_all=False):
     """
-    Count non-null entries for a specific field in a measurement given vehicle and time filters.
-    Returns the count value (an integer).
+    Build the queries counting the non-null entries of the fields of a measurement.
+    With count_all, a single COUNT(*) query returns a "count_<field>" column for every field
+    of the measurement. Otherwise up to MAX_FIELDS_PER_QUERY fields are counted in one query,
+    each COUNT aliased "c_<index>" so the returned columns can be mapped back to the field names.
+    Returns a list of (query, columns) pairs, where columns maps result columns to field names.
     """
-    query = f'''
-    SELECT COUNT("{field}") 
-    FROM "{measurement}"
-    WHERE vehicle_id='{vehicle_id}' 
-      AND time >= '{start_dt.isoformat()}'
-      AND time < '{end_dt.isoformat()}'
-    '''
-    output_func(f"Executing query:\n{query}\n")
-    try:
-        result = client.query(query)
-        points = list(result.get_points())
-    except Exception as e:
-        output_func(f"Error executing query for {measurement}.{field}: {e}\n")
-        return 0
-
-    # The count value may be stored in a key like 'count' or 'count_<field>'.
-    if points:
-        for key in points[0]:
-            if key.startswith("count"):
-                count_val = points[0][key]
-                output_func(f"Count for {measurement}.{field}: {count_val}\n")
-                return count_val
-    return 0
+    if count_all:
+        batches = [("COUNT(*)", {f"count_{field}": field for field in fields})]
+    else:
+        batches = []
+        for offset in range(0, len(fields), MAX_FIELDS_PER_QUERY):
+            chunk = fields[offset:offset + MAX_FIELDS_PER_QUERY]
+            batches.append((", ".join(f'COUNT("{field}") AS "c_{i}"' for i, field in enumerate(chunk)),
+                            {f"c_{i}": field for i, field in enumerate(chunk)}))
+
+    return [(COUNT_QUERY.format(aggregates=aggregates, measurement=measurement, vehicle_id=vehicle_id,
+                                start_ns=start_ns, end_ns=end_ns), columns)
+            for aggregates, columns in batches]
+
+def read_counts(measurement, points, columns, output_func, verbose=False):
+    """
+    Returns a dictionary of field -> count for the result points of one count query
+    (0 when the field has no data).
+    """
+    counts = {field: (points[0].get(column) or 0) if points else 0 for column, field in columns.items()}
+    if verbose:
+        output_func(''.join(f"Count for {measurement}.{field}: {count}\n" for field, count in counts.items()))
+    return counts
+
+def get_counts_for_fields(client, measurement, fields, vehicle_id, start_ns, end_ns, output_func,
+                          count_all=False, verbose=False):
+    """
+    Count non-null entries for all fields of a measurement given vehicle and time filters.
+    The queries and the per-field counts are only echoed to output_func when verbose is set.
+    Returns a dictionary of field -> count (0 when the field has no data).
+    """
+    counts = {}
+    for query, columns in build_count_queries(measurement, fields, vehicle_id, start_ns, end_ns, count_all):
+        if verbose:
+            output_func(f"Executing query:\n{query}\n")
+        try:
+            result = client.query(query)
+            points = list(result.get_points())
+        except Exception as e:
+            output_func(f"Error executing query for {measurement}: {e}\n")
+            points = []
+        counts.update(read_counts(measurement, points, columns, output_func, verbose))
+    return counts
+
+def get_counts_async(params, measurements_fields, vehicle_id, ranges, output_func, count_all=False, verbose=False):
+    """
+    Count the fields of all measurements by running every count query of every time range
+    concurrently with aiohttp, holding at most HTTP_POOL_SIZE connections.
+    The counts of the ranges are summed per field, and one summary line is written per measurement,
+    followed by one line with the total elapsed time.
+    Returns the "Measurement.count_field" keys and the matching counts as two parallel lists.
+    """
+    started = time.perf_counter()
+    queries = []
+    for measurement, fields in measurements_fields.items():
+        if not fields:
+            output_func(f"\nNo fields found for measurement: {measurement}\n")
+            continue
+        for range_start, range_end in ranges:
+            for query, columns in build_count_queries(measurement, fields, vehicle_id, range_start, range_end, count_all):
+                queries.append((measurement, range_start, query, columns))
+    raw_results = async_influx.run_queries(params, [query for _, _, query, _ in queries], HTTP_POOL_SIZE)
+    elapsed = time.perf_counter() - started
+
+    # Counts keyed by (field, range start), so a field listed twice is still counted once per range.
+    counts = {measurement: {} for measurement in measurements_fields}
+    for (measurement, range_start, query, columns), raw in zip(queries, raw_results):
+        if verbose:
+            output_func(f"Executing query:\n{query}\n")
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            points = list(ResultSet(raw).get_points())
+        except Exception as e:
+            output_func(f"Error executing query for {measurement}: {e}\n")
+            points = []
+        for field, count in read_counts(measurement, points, columns, output_func, verbose).items():
+            counts[measurement][field, range_start] = count
+
+    keys, values = [], []
+    for measurement, fields in measurements_fields.items():
+        if fields:
+            output_func(f"{measurement}: {len(fields)} fields\n")
+        keys.extend(f"{measurement}.count_{field}" for field in fields)
+        values.extend(sum(counts[measurement].get((field, range_start), 0) for range_start, _ in ranges)
+                      for field in fields)
+    # All queries run together, so only the batch as a whole has a meaningful elapsed time.
+    output_func(f"{sum(1 for fields in measurements_fields.values() if fields)} measurements, elapsed={elapsed:.2f}s\n")
+    return keys, values
+
+def fetch_measurements_with_series(client, vehicle_id):
+    """
+    Returns the set of measurements that hold at least one series for the vehicle.
+    SHOW SERIES CARDINALITY is answered from the series index without scanning any data,
+    so it does not take the time range into account.
+    """
+    result = client.query(f"SHOW SERIES CARDINALITY WHERE vehicle_id='{vehicle_id}'")
+    return {measurement for (measurement, _), points in result.items() if any(point['count'] for point in points)}
+
+def query_measurement(client, measurement, fields, vehicle_id, start_ns, end_ns, output_func,
+                      count_all=False, verbose=False):
+    """
+    Count the non-null entries of every field of one measurement, then write one summary line.
+    Returns the "Measurement.count_field" keys and the matching counts as two parallel lists.
+    """
+    if not fields:
+        output_func(f"\nNo fields found for measurement: {measurement}\n")
+        return [], []
+
+    started = time.perf_counter()
+    counts = get_counts_for_fields(client, measurement, fields, vehicle_id, start_ns, end_ns, output_func,
+                                   count_all, verbose)
+    output_func(f"{measurement}: {len(fields)} fields, elapsed={time.perf_counter() - started:.2f}s\n")
+    return [f"{measurement}.count_{field}" for field in fields], [counts[field] for field in fields]
 
 # ==================================================
 # Main Query Function to Use Either CSV or DB Data
 # ==================================================
 
-def run_queries(params, output_func):
+def run_queries(params, output_func, client=None):
     """
     Connects to InfluxDB, loads measurement fields (from a CSV file or via DB query),
     and then for each measurement-field combination, counts the non-null entries
     based on vehicle and time filters. Finally, saves the results to a CSV file.
+    An existing client can be passed in to reuse its open connections.
     """
     # Connect to InfluxDB if needed (for running field count queries)
-    try:
-        client = InfluxDBClient(
-            host=params['host'],
-            port=int(params['port']),
-            username=params['username'],
-            password=params['password'],
-            database=params['database']
-        )
-        output_func("Connected to InfluxDB.\n")
-    except Exception as e:
-        output_func(f"Failed to connect to InfluxDB: {e}\n")
-        return
+    if client is None:
+        try:
+            client = create_client(params)
+            output_func("Connected to InfluxDB.\n")
+        except Exception as e:
+            output_func(f"Failed to connect to InfluxDB: {e}\n")
+            return
 
     # Create timezone-aware timestamps using the provided timezone.
     try:
-        local_tz = pytz.timezone(params['timezone'])
-        start_dt = pd.Timestamp(f"{params['start_date']} {params['start_time']}").tz_localize(local_tz)
-        end_dt = pd.Timestamp(f"{params['end_date']} {params['end_time']}").tz_localize(local_tz)
+        local_tz = get_timezone(params['timezone'])
+        start_dt = pd.Timestamp(datetime.strptime(f"{params['start_date']} {params['start_time']}", DATETIME_FORMAT), tz=local_tz)
+        end_dt = pd.Timestamp(datetime.strptime(f"{params['end_date']} {params['end_time']}", DATETIME_FORMAT), tz=local_tz)
+        # Query bounds as nanoseconds since the epoch, the unit InfluxDB stores.
+        start_ns, end_ns = start_dt.value, end_dt.value
+        # Each sub-range is counted by its own queries and the counts are summed.
+        ranges = split_time_range(start_ns, end_ns, int(params.get('chunks', 1)))
     except Exception as e:
         output_func(f"Error creating timestamps: {e}\n")
         return
 
     vehicle_id = params['vehicle_id']
+    verbose = params.get('verbose', False)
 
     # Decide whether to load measurements from CSV or dynamically query the DB.
     if params['use_csv']:
@@ -154,43 +306,87 @@ def run_queries(params, output_func):
             output_func(f"Error loading CSV: {e}\n")
             return
     else:
+        # Reuse a recently fetched schema unless a refresh was requested.
+        measurements_fields = None
+        if not params.get('refresh_schema'):
+            measurements_fields = load_cached_schema(params['host'], params['database'])
+        if measurements_fields is not None:
+            output_func("Loaded measurements and fields from the schema cache.\n")
+        else:
+            try:
+                measurements_fields = fetch_measurements_and_fields(client)
+                output_func("Fetched measurements and fields from InfluxDB.\n")
+            except Exception as e:
+                output_func(f"Error fetching measurements/fields: {e}\n")
+                return
+            try:
+                save_cached_schema(params['host'], params['database'], measurements_fields)
+            except OSError as e:
+                output_func(f"Could not save the schema cache: {e}\n")
+
+    # A schema read from the database lists every field, so COUNT(*) covers them in one
+    # query per measurement; a CSV may select a subset and keeps explicit counts.
+    count_all = not params['use_csv']
+
+    if not any(measurements_fields.values()):
+        output_func("No data to save.\n")
+        return
+
+    # In presence mode every field is reported as 1 when its measurement has series for the
+    # vehicle and 0 otherwise, from a single index lookup instead of COUNT scans.
+    present = None
+    if params.get('mode') == 'presence':
         try:
-            measurements_fields = fetch_measurements_and_fields(client)
-            output_func("Fetched measurements and fields from InfluxDB.\n")
+            present = fetch_measurements_with_series(client, vehicle_id)
         except Exception as e:
-            output_func(f"Error fetching measurements/fields: {e}\n")
+            output_func(f"Error fetching series cardinality: {e}\n")
             return
 
-    results_list = []
-
-    # Loop through each measurement and its fields and count entries.
-    for measurement, fields in measurements_fields.items():
-        output_func(f"\nProcessing Measurement: {measurement}\n")
-        if not fields:
-            output_func("  No fields found for this measurement.\n")
-            continue
-        for field in fields:
-            count_value = get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt, output_func)
-            combined_key = f"{measurement}.count_{field}"
-            results_list.append({
-                'Measurement_Field': combined_key,
-                'Count': count_value
-            })
-
-    # Save results to CSV if any results exist.
-    if results_list:
-        df = pd.DataFrame(results_list)
-        csv_output = (f"measurements_field_counts_{vehicle_id}_"
-                      f"{params['start_date'].replace('-', '')}_"
-                      f"{params['start_time'].replace(':', '')}_to_"
-                      f"{params['end_time'].replace(':', '')}.csv")
-        try:
-            df.to_csv(csv_output, index=False)
-            output_func(f"\nData saved to {csv_output}\n")
-        except Exception as e:
-            output_func(f"Error saving CSV file: {e}\n")
-    else:
-        output_func("No data to save.\n")
+    # Write the rows as the counts arrive, so partial results survive an interrupted run
+    # and nothing is buffered for the whole schema.
+    csv_output = (f"measurements_field_counts_{vehicle_id}_"
+                  f"{params['start_date'].replace('-', '')}_"
+                  f"{params['start_time'].replace(':', '')}_to_"
+                  f"{params['end_time'].replace(':', '')}.csv")
+    try:
+        with open(csv_output, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['Measurement_Field', 'Count'])
+
+            if present is not None:
+                for measurement, fields in measurements_fields.items():
+                    writer.writerows([f"{measurement}.count_{field}", int(measurement in present)] for field in fields)
+            elif async_influx is not None:
+                keys, counts = get_counts_async(params, measurements_fields, vehicle_id, ranges,
+                                                output_func, count_all, verbose)
+                writer.writerows(zip(keys, counts))
+            else:
+                # Query every (measurement, time range) pair in parallel. Up to two queries per worker are
+                # kept in flight and consumed in submission order; the next query is submitted as each one
+                # is taken, so its request overlaps the processing of the current result. Once all ranges
+                # of a measurement are in, their counts are summed per field and written.
+                workers = params.get('workers', DEFAULT_WORKERS)
+                pending = ((measurement, fields, range_start, range_end)
+                           for measurement, fields in measurements_fields.items()
+                           for range_start, range_end in ranges)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    def submit(item):
+                        measurement, fields, range_start, range_end = item
+                        return executor.submit(query_measurement, client, measurement, fields, vehicle_id, range_start, range_end, output_func, count_all, verbose)
+
+                    in_flight = deque(map(submit, islice(pending, 2 * workers)))
+                    parts = []
+                    while in_flight:
+                        future = in_flight.popleft()
+                        in_flight.extend(map(submit, islice(pending, 1)))
+                        parts.append(future.result())
+                        if len(parts) == len(ranges):
+                            keys = parts[0][0]
+                            writer.writerows(zip(keys, map(sum, zip(*(counts for _, counts in parts)))))
+                            parts = []
+        output_func(f"\nData saved to {csv_output}\n")
+    except OSError as e:
+        output_func(f"Error saving CSV file: {e}\n")
 
 # ==================================================
 # Tkinter GUI Application
@@ -201,7 +397,14 @@ class InfluxDBGUI(tk.Tk):
         super().__init__()
         self.title("InfluxDB Query Tool with CSV Measurements")
         self.geometry("750x750")
+        # InfluxDB client reused across runs while the connection parameters are unchanged.
+        self.client = None
+        self.client_key = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Output produced by the query threads, written to the output box by drain_log.
+        self.log_queue = queue.Queue()
         self.create_widgets()
+        self.after(LOG_DRAIN_INTERVAL_MS, self.drain_log)
         # If using an ICO for the window icon:
         self.iconbitmap("Influx-DB.ico")
         # Using a PhotoImage (requires PNG support in Tk):
@@ -248,6 +451,7 @@ class InfluxDBGUI(tk.Tk):
         self.start_time_var = tk.StringVar(value="11:11:59")
         self.end_time_var = tk.StringVar(value="12:12:00")
         self.timezone_var = tk.StringVar(value="Asia/Kolkata")
+        self.chunks_var = tk.StringVar(value="1")
 
         ttk.Label(frame_filter, text="Vehicle ID:").grid(column=0, row=0, sticky="W")
         ttk.Entry(frame_filter, width=20, textvariable=self.vehicle_id_var).grid(column=1, row=0, padx=5, pady=2)
@@ -267,6 +471,9 @@ class InfluxDBGUI(tk.Tk):
         ttk.Label(frame_filter, text="Timezone:").grid(column=0, row=5, sticky="W")
         ttk.Entry(frame_filter, width=20, textvariable=self.timezone_var).grid(column=1, row=5, padx=5, pady=2)
 
+        ttk.Label(frame_filter, text="Parallel time chunks:").grid(column=0, row=6, sticky="W")
+        ttk.Entry(frame_filter, width=20, textvariable=self.chunks_var).grid(column=1, row=6, padx=5, pady=2)
+
         # ==================================================
         # CSV / Measurement Source Options Frame
         # ==================================================
@@ -274,6 +481,9 @@ class InfluxDBGUI(tk.Tk):
         frame_csv.grid(column=0, row=2, padx=10, pady=10, sticky="W")
 
         self.use_csv_var = tk.BooleanVar(value=True)
+        self.refresh_schema_var = tk.BooleanVar(value=False)
+        self.presence_var = tk.BooleanVar(value=False)
+        self.verbose_var = tk.BooleanVar(value=False)
         self.csv_filename_var = tk.StringVar(value="")  # Initially empty
 
         ttk.Checkbutton(frame_csv, text="Use CSV for Measurement Fields", variable=self.use_csv_var).grid(column=0, row=0, sticky="W", padx=5, pady=2)
@@ -285,6 +495,10 @@ class InfluxDBGUI(tk.Tk):
         self.select_csv_btn = ttk.Button(frame_csv, text="Select File", command=self.select_csv_file)
         self.select_csv_btn.grid(column=2, row=1, padx=5, pady=2)
 
+        ttk.Checkbutton(frame_csv, text="Refresh schema now", variable=self.refresh_schema_var).grid(column=0, row=2, sticky="W", padx=5, pady=2)
+        ttk.Checkbutton(frame_csv, text="Presence only (1/0 per field)", variable=self.presence_var).grid(column=0, row=3, sticky="W", padx=5, pady=2)
+        ttk.Checkbutton(frame_csv, text="Show executed queries", variable=self.verbose_var).grid(column=0, row=4, sticky="W", padx=5, pady=2)
+
         # ==================================================
         # Run Button and Output Display
         # ==================================================
@@ -304,8 +518,28 @@ class InfluxDBGUI(tk.Tk):
             self.csv_filename_var.set(filename)
     
     def append_output(self, message):
-        self.output_text.insert(tk.END, message)
-        self.output_text.see(tk.END)
+        # Called from the query worker threads; drain_log writes the messages on the Tk main loop.
+        self.log_queue.put(message)
+
+    def drain_log(self):
+        """ Writes the queued output messages to the output box in one insert, then reschedules itself. """
+        messages = []
+        finished = False
+        try:
+            while len(messages) < LOG_DRAIN_BATCH:
+                message = self.log_queue.get_nowait()
+                if message is RUN_FINISHED:
+                    finished = True
+                    break
+                messages.append(message)
+        except queue.Empty:
+            pass
+        if messages:
+            self.output_text.insert(tk.END, ''.join(messages))
+            self.output_text.see(tk.END)
+        if finished:
+            self.run_button.config(state=tk.NORMAL)
+        self.after(LOG_DRAIN_INTERVAL_MS, self.drain_log)
 
     def on_run_query(self):
         # Clear previous output
@@ -326,19 +560,38 @@ class InfluxDBGUI(tk.Tk):
             'end_time': self.end_time_var.get(),
             'timezone': self.timezone_var.get(),
             'use_csv': self.use_csv_var.get(),
+            'refresh_schema': self.refresh_schema_var.get(),
+            'mode': 'presence' if self.presence_var.get() else 'count',
+            'verbose': self.verbose_var.get(),
+            'chunks': self.chunks_var.get(),
             'csv_filename': self.csv_filename_var.get()
         }
 
         # Run the query in a separate thread to keep the GUI responsive.
         threading.Thread(target=self.run_query_thread, args=(params,)).start()
 
+    def get_client(self, params):
+        """Returns the cached InfluxDB client, creating a new one if the connection parameters changed."""
+        client_key = tuple(params[key] for key in ('host', 'port', 'username', 'password', 'database'))
+        if self.client is None or self.client_key != client_key:
+            if self.client is not None:
+                self.client.close()
+            self.client = create_client(params)
+            self.client_key = client_key
+        return self.client
+
+    def on_close(self):
+        if self.client is not None:
+            self.client.close()
+        self.destroy()
+
     def run_query_thread(self, params):
         try:
-            run_queries(params, self.append_output)
+            run_queries(params, self.append_output, self.get_client(params))
         except Exception as e:
             self.append_output(f"Error during query execution: {e}\n")
         finally:
-            self.run_button.config(state=tk.NORMAL)
+            self.log_queue.put(RUN_FINISHED)
 
 # ==================================================
 # Main Execution
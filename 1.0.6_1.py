@@ -1,10 +1,60 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 from influxdb import InfluxDBClient
+from influxdb.exceptions import InfluxDBClientError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-import pytz
 import threading
 import os
+import csv
+import queue
+import re
+import time
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+from schema_cache import load_cached_schema, save_cached_schema
+from count_cache import CountCache, HOUR_SECONDS
+
+try:
+    import async_influx
+except ImportError:
+    async_influx = None
+
+# Number of measurements per SHOW FIELD KEYS statement when falling back to batches.
+FIELD_KEYS_BATCH_SIZE = 50
+
+# Number of measurement count queries kept in flight at once.
+DEFAULT_CONCURRENCY = 16
+
+# Number of keep-alive HTTP connections held by the client's session.
+HTTP_POOL_SIZE = 32
+
+# Server errors that are retried before a query is reported as failed.
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+
+# Maximum number of COUNT() expressions in a single SELECT statement.
+COUNT_FIELDS_PER_QUERY = 100
+
+# Timezone objects are looked up once per name and reused across runs.
+get_timezone = lru_cache(maxsize=32)(ZoneInfo)
+
+# Maximum query text sent in one multi-statement request, kept well below URL length
+# limits since the statements travel URL-encoded in the query string.
+MAX_BATCH_QUERY_LENGTH = 64 * 1024
+
+# A measurement block in a fields file: a header line followed by indented field lines.
+MEASUREMENT_BLOCK_PATTERN = re.compile(r'^[ \t]*(\S[^\n]*)((?:\n[ \t]+\S[^\n]*)*)', re.M)
+
+# Interval between output box refreshes, in milliseconds.
+LOG_DRAIN_INTERVAL_MS = 50
+
+# Maximum number of queued messages written to the output box per refresh.
+LOG_DRAIN_BATCH = 500
+
+# Queued by a query thread after its last message, so drain_log re-enables the Run button on the Tk main loop.
+RUN_FINISHED = object()
 
 # ==================================================
 # Helper Functions for Loading Measurement Fields
@@ -23,114 +73,347 @@ def load_measurements_fields(filename):
     Returns a dictionary mapping measurement names to lists of field keys.
     """
     measurements_fields = {}
-    current_measurement = None
 
     try:
         with open(filename, 'r') as f:
-            for line in f:
-                stripped_line = line.strip()
-                # Skip blank lines
-                if not stripped_line:
-                    current_measurement = None
-                    continue
-
-                # If the line begins with whitespace and we already have a measurement,
-                # treat it as an additional field.
-                if line[0].isspace() and current_measurement:
-                    field = stripped_line
-                    measurements_fields[current_measurement].append(field)
-                else:
-                    # Otherwise, assume it's the start of a new measurement block.
-                    # Expect at least two parts, measurement name and the first field.
-                    parts = stripped_line.split('\t')
-                    if len(parts) >= 2:
-                        current_measurement = parts[0]
-                        measurements_fields[current_measurement] = [parts[1]]
-                    else:
-                        # In case there is only one part, create an entry with an empty field list.
-                        current_measurement = parts[0]
-                        measurements_fields[current_measurement] = []
+            text = f.read()
     except Exception as e:
         raise Exception(f"Error reading measurements file: {e}")
 
+    # One regex pass over the whole file: each match is a header line plus the indented
+    # field lines directly below it. Blank lines end a block.
+    for block in MEASUREMENT_BLOCK_PATTERN.finditer(text):
+        # Expect the measurement name and the first field separated by a tab.
+        parts = block.group(1).strip().split('\t')
+        fields = [parts[1]] if len(parts) >= 2 else []
+        fields.extend(line.strip() for line in block.group(2).split('\n') if line)
+        measurements_fields[parts[0]] = fields
+
     return measurements_fields
 
+def create_client(params):
+    """
+    Create an InfluxDBClient whose HTTP session keeps up to HTTP_POOL_SIZE connections
+    alive, so concurrent queries reuse established sockets instead of reconnecting.
+    Responses are requested gzip-compressed, and transient 5xx errors are retried.
+    """
+    client = InfluxDBClient(
+        host=params['host'],
+        port=int(params['port']),
+        username=params['username'],
+        password=params['password'],
+        database=params['database']
+    )
+    client._session.headers['Accept-Encoding'] = 'gzip, deflate'
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=RETRY_STATUS_CODES,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE,
+                          max_retries=retry)
+    client._session.mount('http://', adapter)
+    client._session.mount('https://', adapter)
+    return client
+
 def fetch_measurements_and_fields(client):
     """
-    Retrieve all measurements and their field keys from InfluxDB.
+    Retrieve all measurements and their field keys from InfluxDB with a single
+    SHOW FIELD KEYS query; measurement names come from the returned series.
+    Falls back to batched queries if the server rejects the full response.
+    Returns a dictionary where keys are measurement names and values are lists of field keys.
+    """
+    try:
+        fields_result = client.query('SHOW FIELD KEYS')
+    except InfluxDBClientError:
+        return fetch_measurements_and_fields_batched(client)
+
+    measurements_fields = {}
+    for series in fields_result.raw.get('series', []):
+        measurements_fields[series['name']] = [row[0] for row in series.get('values', [])]
+
+    return measurements_fields
+
+def fetch_measurements_and_fields_batched(client, batch_size=FIELD_KEYS_BATCH_SIZE):
+    """
+    Retrieve field keys for `batch_size` measurements per SHOW FIELD KEYS query.
     Returns a dictionary where keys are measurement names and values are lists of field keys.
     """
     measurements_query = 'SHOW MEASUREMENTS'
     measurements_result = client.query(measurements_query)
-    measurements = list(measurements_result.get_points())
+    measurement_names = [row[0] for series in measurements_result.raw.get('series', [])
+                         for row in series.get('values', [])]
 
     measurements_fields = {}
-    for measurement in measurements:
-        measurement_name = measurement['name']
-        fields_query = f'SHOW FIELD KEYS FROM "{measurement_name}"'
+    for i in range(0, len(measurement_names), batch_size):
+        batch = measurement_names[i:i + batch_size]
+        fields_query = 'SHOW FIELD KEYS FROM ' + ', '.join(f'"{name}"' for name in batch)
         fields_result = client.query(fields_query)
-        fields = list(fields_result.get_points())
-        field_names = [field['fieldKey'] for field in fields]
-        measurements_fields[measurement_name] = field_names
+        for series in fields_result.raw.get('series', []):
+            measurements_fields[series['name']] = [row[0] for row in series.get('values', [])]
 
     return measurements_fields
 
-def get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt, output_func):
+def build_count_queries(measurement, fields, where_clause, count_all=False):
     """
-    Count non-null entries for a specific field in a measurement given vehicle and time filters.
-    Returns the count value (an integer).
+    Build the SELECT COUNT queries covering every given field of a measurement,
+    with at most COUNT_FIELDS_PER_QUERY fields per statement.
+    With count_all, a single SELECT COUNT(*) counts every field of the measurement.
     """
-    query = f'''
-    SELECT COUNT("{field}") 
+    if count_all:
+        return [f'''
+    SELECT COUNT(*)
     FROM "{measurement}"
-    WHERE vehicle_id='{vehicle_id}' 
-      AND time >= '{start_dt.isoformat()}'
-      AND time < '{end_dt.isoformat()}'
-    '''
-    output_func(f"Executing query:\n{query}\n")
+    {where_clause}
+    ''']
+
+    unique_fields = list(dict.fromkeys(fields))
+    queries = []
+    for i in range(0, len(unique_fields), COUNT_FIELDS_PER_QUERY):
+        chunk = unique_fields[i:i + COUNT_FIELDS_PER_QUERY]
+        # Alias each count the way COUNT(*) names its columns, so both map back to field names.
+        selections = ', '.join(f'COUNT("{field}") AS "count_{field}"' for field in chunk)
+        queries.append(f'''
+    SELECT {selections}
+    FROM "{measurement}"
+    {where_clause}
+    ''')
+    return queries
+
+def parse_counts(raw, counts):
+    """
+    Update `counts` from the raw result of a count query built by build_count_queries.
+    """
+    # Read the single result row straight from the raw series, skipping per-point dicts.
+    series = raw.get('series')
+    if series:
+        for column, value in zip(series[0]['columns'], series[0]['values'][0]):
+            if column.startswith('count_'):
+                counts[column[len('count_'):]] = value or 0
+
+def format_counts(measurement, counts):
+    return ''.join(f"Count for {measurement}.{field}: {count_val}\n" for field, count_val in counts.items())
+
+def query_counts(client, measurement, fields, where_clause, output_func, count_all=False, verbose=False):
+    """
+    Count non-null entries for every given field of a measurement matching the where clause.
+    Executed queries are only echoed to output_func when verbose is set.
+    Returns a dictionary mapping field names to count values (integers).
+    """
+    counts = {field: 0 for field in fields}
+    for query in build_count_queries(measurement, fields, where_clause, count_all):
+        if verbose:
+            output_func(f"Executing query:\n{query}\n")
+        try:
+            result = client.query(query)
+        except Exception as e:
+            output_func(f"Error executing query for {measurement}: {e}\n")
+            continue
+        parse_counts(result.raw, counts)
+    return counts
+
+def get_counts_for_measurement(client, measurement, fields, where_clause, output_func,
+                               count_all=False, verbose=False):
+    """
+    Count the fields of a measurement with query_counts and report the counts to output_func.
+    """
+    counts = query_counts(client, measurement, fields, where_clause, output_func, count_all, verbose)
+    output_func(format_counts(measurement, counts))
+    return counts
+
+def batch_count_queries(tasks, where_clause, count_all, concurrency):
+    """
+    Split the count queries of all (measurement, fields) tasks into batches that are each
+    sent as one multi-statement request. Batches are sized so about `concurrency` of them
+    run in parallel, and never exceed MAX_BATCH_QUERY_LENGTH characters of query text.
+    Returns a list of batches, each a list of (measurement, fields, queries).
+    """
+    per_batch = -(-len(tasks) // concurrency)
+    batches, batch, batch_length = [], [], 0
+    for measurement, fields in tasks:
+        queries = build_count_queries(measurement, fields, where_clause, count_all)
+        length = sum(len(query) + 1 for query in queries)
+        if batch and (len(batch) >= per_batch or batch_length + length > MAX_BATCH_QUERY_LENGTH):
+            batches.append(batch)
+            batch, batch_length = [], 0
+        batch.append((measurement, fields, queries))
+        batch_length += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+def get_counts_batch(client, batch, output_func, verbose=False):
+    """
+    Run the count queries of a batch from batch_count_queries as one ';'-separated request.
+    If the request fails, the statements are retried one at a time.
+    Returns a dictionary mapping measurement names to {field: count} dictionaries.
+    """
+    statements = [query for _, _, queries in batch for query in queries]
+    if verbose:
+        output_func(''.join(f"Executing query:\n{query}\n" for query in statements))
     try:
-        result = client.query(query)
-        points = list(result.get_points())
+        results = client.query(';'.join(statements))
+        # A single statement comes back as a ResultSet, several as a list of them.
+        results = results if isinstance(results, list) else [results]
     except Exception as e:
-        output_func(f"Error executing query for {measurement}.{field}: {e}\n")
-        return 0
-
-    # The count value may be stored in a key like 'count' or 'count_<field>'.
-    if points:
-        for key in points[0]:
-            if key.startswith("count"):
-                count_val = points[0][key]
-                output_func(f"Count for {measurement}.{field}: {count_val}\n")
-                return count_val
-    return 0
+        output_func(f"Error executing batched count queries, retrying one by one: {e}\n")
+        results = []
+        for statement in statements:
+            try:
+                results.append(client.query(statement))
+            except Exception as e:
+                output_func(f"Error executing query:\n{statement}\n{e}\n")
+                results.append(None)
+
+    batch_counts = {}
+    result_iter = iter(results)
+    for measurement, fields, queries in batch:
+        counts = {field: 0 for field in fields}
+        for _ in queries:
+            result = next(result_iter)
+            if result is not None:
+                parse_counts(result.raw, counts)
+        batch_counts[measurement] = counts
+        output_func(format_counts(measurement, counts))
+    return batch_counts
+
+def epoch_where_clause(vehicle_id, start_s, end_s):
+    """
+    Build the vehicle and time filter for a range given in epoch seconds.
+    """
+    return f"WHERE vehicle_id='{vehicle_id}' AND time >= {start_s}s AND time < {end_s}s"
+
+def hour_runs(hours):
+    """
+    Group sorted hour starts (epoch seconds) into [start, end) ranges of consecutive hours.
+    """
+    runs = []
+    for hour in hours:
+        if runs and runs[-1][1] == hour:
+            runs[-1][1] = hour + HOUR_SECONDS
+        else:
+            runs.append([hour, hour + HOUR_SECONDS])
+    return runs
+
+def parse_hourly_counts(raw):
+    """
+    Returns {hour start: {field: count}} from the raw result of a
+    COUNT(*) ... GROUP BY time(1h) query run with epoch='s'.
+    """
+    hourly_counts = {}
+    for series in raw.get('series', []):
+        columns = series['columns']
+        for row in series['values']:
+            hourly_counts[row[0]] = {
+                column[len('count_'):]: value
+                for column, value in zip(columns[1:], row[1:])
+                if column.startswith('count_') and value
+            }
+    return hourly_counts
+
+def get_counts_cached(client, count_cache, source, vehicle_id, measurement, fields, start_dt, end_dt,
+                      output_func, verbose=False):
+    """
+    Count the fields of a measurement, reusing the hourly counts cached by earlier runs.
+    Complete hours missing from the cache are counted with one COUNT(*) ... GROUP BY time(1h)
+    query per run of consecutive hours and stored; the partial hours at either end of the
+    range and the current hour are always counted live.
+    Returns a dictionary mapping field names to count values (integers).
+    """
+    start_s = int(start_dt.timestamp())
+    end_s = int(end_dt.timestamp())
+    first_hour = -(-start_s // HOUR_SECONDS) * HOUR_SECONDS
+    # The current hour may still receive data, so it is never cached.
+    end_hour = min(end_s, int(time.time())) // HOUR_SECONDS * HOUR_SECONDS
+    if first_hour >= end_hour:
+        return get_counts_for_measurement(client, measurement, fields, epoch_where_clause(vehicle_id, start_s, end_s),
+                                          output_func, verbose=verbose)
+
+    missing_hours = count_cache.missing_hours(source, vehicle_id, measurement, first_hour, end_hour)
+    for run_start, run_end in hour_runs(missing_hours):
+        where_clause = epoch_where_clause(vehicle_id, run_start, run_end) + " GROUP BY time(1h)"
+        query = build_count_queries(measurement, fields, where_clause, count_all=True)[0]
+        if verbose:
+            output_func(f"Executing query:\n{query}\n")
+        try:
+            result = client.query(query, epoch='s')
+        except Exception as e:
+            # Leave the hours uncovered and count the whole range live instead.
+            output_func(f"Error executing query for {measurement}: {e}\n")
+            return get_counts_for_measurement(client, measurement, fields,
+                                              epoch_where_clause(vehicle_id, start_s, end_s),
+                                              output_func, verbose=verbose)
+        count_cache.store(source, vehicle_id, measurement, range(run_start, run_end, HOUR_SECONDS),
+                          parse_hourly_counts(result.raw))
+
+    cached_counts = count_cache.sum_counts(source, vehicle_id, measurement, first_hour, end_hour)
+    counts = {field: cached_counts.get(field, 0) for field in fields}
+    for edge_start, edge_end in ((start_s, first_hour), (end_hour, end_s)):
+        if edge_start < edge_end:
+            edge_counts = query_counts(client, measurement, fields,
+                                       epoch_where_clause(vehicle_id, edge_start, edge_end),
+                                       output_func, verbose=verbose)
+            for field, count_val in edge_counts.items():
+                counts[field] += count_val
+
+    output_func(format_counts(measurement, counts))
+    return counts
+
+def get_counts_async(params, tasks, where_clause, output_func, count_all=False, verbose=False):
+    """
+    Count the fields of all (measurement, fields) tasks by running every count
+    query concurrently with aiohttp.
+    Executed queries are only echoed to output_func when verbose is set.
+    Returns a dictionary mapping measurement names to {field: count} dictionaries.
+    """
+    queries = [
+        (measurement, query)
+        for measurement, fields in tasks
+        for query in build_count_queries(measurement, fields, where_clause, count_all)
+    ]
+    if verbose:
+        output_func(''.join(f"Executing query:\n{query}\n" for _, query in queries))
+    raw_results = async_influx.run_queries(params, [query for _, query in queries])
+
+    counts = {measurement: {field: 0 for field in fields} for measurement, fields in tasks}
+    for (measurement, query), raw in zip(queries, raw_results):
+        if isinstance(raw, Exception):
+            output_func(f"Error executing query for {measurement}: {raw}\n")
+        elif 'error' in raw:
+            output_func(f"Error executing query for {measurement}: {raw['error']}\n")
+        else:
+            parse_counts(raw, counts[measurement])
+
+    output_func(''.join(format_counts(measurement, measurement_counts)
+                        for measurement, measurement_counts in counts.items()))
+    return counts
+
+def write_counts(writer, measurement, fields, counts):
+    """
+    Write one "<measurement>.count_<field>,<count>" row per field to a csv writer.
+    """
+    writer.writerows([f"{measurement}.count_{field}", counts[field]] for field in fields)
 
 # ==================================================
 # Main Query Function to Use Either CSV or DB Data
 # ==================================================
 
-def run_queries(params, output_func):
+def run_queries(params, output_func, client=None):
     """
     Connects to InfluxDB, loads measurement fields (from a CSV file or via DB query),
     and then for each measurement-field combination, counts the non-null entries
     based on vehicle and time filters. Finally, saves the results to a CSV file.
+    An existing client can be passed in to reuse its open connections.
     """
     # Connect to InfluxDB if needed (for running field count queries)
-    try:
-        client = InfluxDBClient(
-            host=params['host'],
-            port=int(params['port']),
-            username=params['username'],
-            password=params['password'],
-            database=params['database']
-        )
-        output_func("Connected to InfluxDB.\n")
-    except Exception as e:
-        output_func(f"Failed to connect to InfluxDB: {e}\n")
-        return
+    if client is None:
+        try:
+            client = create_client(params)
+            output_func("Connected to InfluxDB.\n")
+        except Exception as e:
+            output_func(f"Failed to connect to InfluxDB: {e}\n")
+            return
 
     # Create timezone-aware timestamps using the provided timezone.
     try:
-        local_tz = pytz.timezone(params['timezone'])
+        local_tz = get_timezone(params['timezone'])
         start_dt = pd.Timestamp(f"{params['start_date']} {params['start_time']}").tz_localize(local_tz)
         end_dt = pd.Timestamp(f"{params['end_date']} {params['end_time']}").tz_localize(local_tz)
     except Exception as e:
@@ -138,6 +421,9 @@ def run_queries(params, output_func):
         return
 
     vehicle_id = params['vehicle_id']
+    # The filter is identical for every query, so format it only once.
+    where_clause = (f"WHERE vehicle_id='{vehicle_id}' "
+                    f"AND time >= '{start_dt.isoformat()}' AND time < '{end_dt.isoformat()}'")
 
     # Decide whether to load measurements from CSV or dynamically query the DB.
     if params['use_csv']:
@@ -152,43 +438,88 @@ def run_queries(params, output_func):
             output_func(f"Error loading CSV: {e}\n")
             return
     else:
-        try:
-            measurements_fields = fetch_measurements_and_fields(client)
-            output_func("Fetched measurements and fields from InfluxDB.\n")
-        except Exception as e:
-            output_func(f"Error fetching measurements/fields: {e}\n")
-            return
-
-    results_list = []
-
-    # Loop through each measurement and its fields and count entries.
+        # Reuse a recently fetched schema unless a refresh was requested.
+        measurements_fields = None
+        if not params.get('refresh_schema'):
+            measurements_fields = load_cached_schema(params['host'], params['database'])
+        if measurements_fields is not None:
+            output_func("Loaded measurements and fields from the schema cache.\n")
+        else:
+            try:
+                measurements_fields = fetch_measurements_and_fields(client)
+                output_func("Fetched measurements and fields from InfluxDB.\n")
+            except Exception as e:
+                output_func(f"Error fetching measurements/fields: {e}\n")
+                return
+            try:
+                save_cached_schema(params['host'], params['database'], measurements_fields)
+            except OSError as e:
+                output_func(f"Could not save the schema cache: {e}\n")
+
+    # Each count query is an independent HTTP round-trip, so run them concurrently.
+    tasks = []
     for measurement, fields in measurements_fields.items():
-        output_func(f"\nProcessing Measurement: {measurement}\n")
         if not fields:
-            output_func("  No fields found for this measurement.\n")
+            output_func(f"\nNo fields found for measurement: {measurement}\n")
             continue
-        for field in fields:
-            count_value = get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt, output_func)
-            combined_key = f"{measurement}.count_{field}"
-            results_list.append({
-                'Measurement_Field': combined_key,
-                'Count': count_value
-            })
-
-    # Save results to CSV if any results exist.
-    if results_list:
-        df = pd.DataFrame(results_list)
-        csv_output = (f"measurements_field_counts_{vehicle_id}_"
-                      f"{params['start_date'].replace('-', '')}_"
-                      f"{params['start_time'].replace(':', '')}_to_"
-                      f"{params['end_time'].replace(':', '')}.csv")
-        try:
-            df.to_csv(csv_output, index=False)
-            output_func(f"\nData saved to {csv_output}\n")
-        except Exception as e:
-            output_func(f"Error saving CSV file: {e}\n")
-    else:
+        tasks.append((measurement, fields))
+
+    # A schema read from the database lists every field, so COUNT(*) covers them in one
+    # statement per measurement; a CSV may select a subset and keeps explicit counts.
+    count_all = not params['use_csv']
+    verbose = params.get('verbose', False)
+    # Hourly counts from earlier runs are keyed by the database they came from.
+    use_count_cache = params.get('use_count_cache', False)
+    source = f"{params['host']}:{params['port']}/{params['database']}"
+
+    if not tasks:
         output_func("No data to save.\n")
+        return
+
+    # Write each measurement's rows as soon as its counts arrive, so partial results
+    # survive an interrupted run and nothing is buffered for the whole schema.
+    csv_output = (f"measurements_field_counts_{vehicle_id}_"
+                  f"{params['start_date'].replace('-', '')}_"
+                  f"{params['start_time'].replace(':', '')}_to_"
+                  f"{params['end_time'].replace(':', '')}.csv")
+    try:
+        with open(csv_output, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['Measurement_Field', 'Count'])
+
+            if async_influx is not None and not use_count_cache:
+                output_func(f"\nCounting fields of {len(tasks)} measurements with async HTTP requests.\n")
+                counts = get_counts_async(params, tasks, where_clause, output_func, count_all, verbose)
+                for measurement, fields in tasks:
+                    write_counts(writer, measurement, fields, counts[measurement])
+            else:
+                concurrency = params.get('concurrency', DEFAULT_CONCURRENCY)
+                output_func(f"\nCounting fields of {len(tasks)} measurements using {concurrency} workers.\n")
+                count_cache = CountCache() if use_count_cache else None
+                try:
+                    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                        if count_cache is not None:
+                            futures = [
+                                (measurement, executor.submit(get_counts_cached, client, count_cache, source, vehicle_id,
+                                                              measurement, fields, start_dt, end_dt, output_func, verbose))
+                                for measurement, fields in tasks
+                            ]
+                            # Rows are written in submission order so the CSV is the same from run to run.
+                            for measurement, future in futures:
+                                write_counts(writer, measurement, measurements_fields[measurement], future.result())
+                        else:
+                            batches = batch_count_queries(tasks, where_clause, count_all, concurrency)
+                            futures = [executor.submit(get_counts_batch, client, batch, output_func, verbose)
+                                       for batch in batches]
+                            for future in futures:
+                                for measurement, counts in future.result().items():
+                                    write_counts(writer, measurement, measurements_fields[measurement], counts)
+                finally:
+                    if count_cache is not None:
+                        count_cache.close()
+        output_func(f"\nData saved to {csv_output}\n")
+    except OSError as e:
+        output_func(f"Error saving CSV file: {e}\n")
 
 # ==================================================
 # Tkinter GUI Application
@@ -206,7 +537,14 @@ class InfluxDBGUI(tk.Tk):
         except Exception as e:
             print(f"Icon not set: {e}")
         self.geometry("750x750")
+        # InfluxDB client reused across runs while the connection parameters are unchanged.
+        self.client = None
+        self.client_key = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Output produced by the query threads, written to the output box by drain_log.
+        self.log_queue = queue.Queue()
         self.create_widgets()
+        self.after(LOG_DRAIN_INTERVAL_MS, self.drain_log)
 
     def create_widgets(self):
         # --------------------------------------------------
@@ -274,6 +612,9 @@ class InfluxDBGUI(tk.Tk):
         frame_csv.grid(column=0, row=2, padx=10, pady=10, sticky="W")
 
         self.use_csv_var = tk.BooleanVar(value=True)
+        self.refresh_schema_var = tk.BooleanVar(value=False)
+        self.verbose_var = tk.BooleanVar(value=False)
+        self.use_count_cache_var = tk.BooleanVar(value=False)
         self.csv_filename_var = tk.StringVar(value="")  # Initially empty
 
         ttk.Checkbutton(frame_csv, text="Use CSV for Measurement Fields", variable=self.use_csv_var).grid(column=0, row=0, sticky="W", padx=5, pady=2)
@@ -285,6 +626,10 @@ class InfluxDBGUI(tk.Tk):
         self.select_csv_btn = ttk.Button(frame_csv, text="Select File", command=self.select_csv_file)
         self.select_csv_btn.grid(column=2, row=1, padx=5, pady=2)
 
+        ttk.Checkbutton(frame_csv, text="Refresh schema now", variable=self.refresh_schema_var).grid(column=0, row=2, sticky="W", padx=5, pady=2)
+        ttk.Checkbutton(frame_csv, text="Show executed queries", variable=self.verbose_var).grid(column=0, row=3, sticky="W", padx=5, pady=2)
+        ttk.Checkbutton(frame_csv, text="Reuse cached hourly counts", variable=self.use_count_cache_var).grid(column=0, row=4, sticky="W", padx=5, pady=2)
+
         # --------------------------------------------------
         # Run Button and Output Display
         # --------------------------------------------------
@@ -304,8 +649,28 @@ class InfluxDBGUI(tk.Tk):
             self.csv_filename_var.set(filename)
     
     def append_output(self, message):
-        self.output_text.insert(tk.END, message)
-        self.output_text.see(tk.END)
+        # Called from the query worker threads; drain_log writes the messages on the Tk main loop.
+        self.log_queue.put(message)
+
+    def drain_log(self):
+        """ Writes the queued output messages to the output box in one insert, then reschedules itself. """
+        messages = []
+        finished = False
+        try:
+            while len(messages) < LOG_DRAIN_BATCH:
+                message = self.log_queue.get_nowait()
+                if message is RUN_FINISHED:
+                    finished = True
+                    break
+                messages.append(message)
+        except queue.Empty:
+            pass
+        if messages:
+            self.output_text.insert(tk.END, ''.join(messages))
+            self.output_text.see(tk.END)
+        if finished:
+            self.run_button.config(state=tk.NORMAL)
+        self.after(LOG_DRAIN_INTERVAL_MS, self.drain_log)
 
     def on_run_query(self):
         # Clear previous output
@@ -326,19 +691,38 @@ class InfluxDBGUI(tk.Tk):
             'end_time': self.end_time_var.get(),
             'timezone': self.timezone_var.get(),
             'use_csv': self.use_csv_var.get(),
+            'refresh_schema': self.refresh_schema_var.get(),
+            'verbose': self.verbose_var.get(),
+            'use_count_cache': self.use_count_cache_var.get(),
             'csv_filename': self.csv_filename_var.get()
         }
 
         # Run the query in a separate thread to keep the GUI responsive.
         threading.Thread(target=self.run_query_thread, args=(params,)).start()
 
+    def get_client(self, params):
+        """Returns the cached InfluxDB client, creating a new one if the connection parameters changed."""
+        client_key = tuple(params[key] for key in ('host', 'port', 'username', 'password', 'database'))
+        if self.client is None or self.client_key != client_key:
+            if self.client is not None:
+                self.client.close()
+            self.client = create_client(params)
+            self.client_key = client_key
+        return self.client
+
+    def on_close(self):
+        if self.client is not None:
+            self.client.close()
+        self.destroy()
+
     def run_query_thread(self, params):
         try:
-            run_queries(params, self.append_output)
+            run_queries(params, self.append_output, self.get_client(params))
         except Exception as e:
             self.append_output(f"Error during query execution: {e}\n")
         finally:
-            self.run_button.config(state=tk.NORMAL)
+            # The worker thread never touches Tk; drain_log re-enables the button once it reaches this.
+            self.log_queue.put(RUN_FINISHED)
 
 # ==================================================
 # Main Execution
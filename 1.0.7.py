@@ -1,12 +1,40 @@
 import os
+import csv
+import atexit
 import platform
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import pandas as pd
-import pytz
-from influxdb import InfluxDBClient
+
+# numpy, pandas, pytz and influxdb (which imports pandas itself) are imported by the functions
+# that use them, so the window opens without waiting for them to load.
+
+# Maximum number of fields counted by a single query, keeping the query string bounded.
+MAX_FIELDS_PER_QUERY = 200
+
+# Count query template; the vehicle and time bounds are bound parameters shared by every query.
+COUNT_QUERY = 'SELECT {aggregates} FROM "{measurement}" WHERE vehicle_id=$vehicle_id AND time >= $start AND time < $end'
+
+# Number of measurements queried in parallel.
+MAX_WORKERS = 16
+
+# Number of keep-alive HTTP connections held by the client's session (at least MAX_WORKERS).
+HTTP_POOL_SIZE = 32
+
+# Server errors that are retried before a query is reported as failed.
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+
+# Interval between output box refreshes, in milliseconds.
+LOG_DRAIN_INTERVAL_MS = 50
+
+# Maximum number of queued messages written to the output box per refresh.
+LOG_DRAIN_BATCH = 500
+
+# Queued by a query thread after its last message, so drain_log re-enables the buttons on the Tk main loop.
+RUN_FINISHED = object()
 
 # =======================================================
 # InfluxDB Query Functionality (Tab 1)
@@ -22,102 +50,130 @@ def load_measurements_fields(filename):
     Returns a dictionary mapping measurement names to lists of field keys.
     """
     measurements_fields = {}
-    current_measurement = None
+    current_fields = None
 
     try:
         with open(filename, 'r') as f:
-            for line in f:
-                stripped_line = line.strip()
-                # Skip blank lines
-                if not stripped_line:
-                    current_measurement = None
-                    continue
-
-                if line[0].isspace() and current_measurement:
-                    field = stripped_line
-                    measurements_fields[current_measurement].append(field)
-                else:
-                    parts = stripped_line.split('\t')
-                    if len(parts) >= 2:
-                        current_measurement = parts[0]
-                        measurements_fields[current_measurement] = [parts[1]]
-                    else:
-                        current_measurement = parts[0]
-                        measurements_fields[current_measurement] = []
+            lines = f.read().split('\n')
+
+        for line in lines:
+            stripped_line = line.strip()
+            # Blank lines end the current block.
+            if not stripped_line:
+                current_fields = None
+                continue
+
+            if current_fields is not None and line[0].isspace():
+                # Indented line inside a block: an additional field.
+                current_fields.append(stripped_line)
+            else:
+                # Start of a new measurement block: the name, optionally followed by the first field.
+                parts = stripped_line.split('\t', 2)
+                current_fields = measurements_fields[parts[0]] = parts[1:2]
     except Exception as e:
         raise Exception(f"Error reading measurements file: {e}")
 
     return measurements_fields
 
+def create_client(params):
+    """
+    Create an InfluxDBClient whose HTTP session keeps up to HTTP_POOL_SIZE connections
+    alive, so successive queries reuse established sockets instead of reconnecting.
+    Transient 5xx errors are retried with a short backoff.
+    """
+    from influxdb import InfluxDBClient
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    client = InfluxDBClient(
+        host=params['host'],
+        port=int(params['port']),
+        username=params['username'],
+        password=params['password'],
+        database=params['database']
+    )
+    retry = Retry(total=3, backoff_factor=0.2, status_forcelist=RETRY_STATUS_CODES,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE,
+                          max_retries=retry)
+    client._session.mount('http://', adapter)
+    client._session.mount('https://', adapter)
+    return client
+
 def fetch_measurements_and_fields(client):
     """
-    Retrieve all measurements and their field keys from InfluxDB.
+    Retrieve all measurements and their field keys with a single SHOW FIELD KEYS query.
     Returns a dictionary where keys are measurement names and values are lists of field keys.
     """
-    measurements_query = 'SHOW MEASUREMENTS'
-    measurements_result = client.query(measurements_query)
-    measurements = list(measurements_result.get_points())
+    # Without a FROM clause the result holds one series per measurement.
+    fields_result = client.query('SHOW FIELD KEYS')
 
     measurements_fields = {}
-    for measurement in measurements:
-        measurement_name = measurement['name']
-        fields_query = f'SHOW FIELD KEYS FROM "{measurement_name}"'
-        fields_result = client.query(fields_query)
-        fields = list(fields_result.get_points())
-        field_names = [field['fieldKey'] for field in fields]
-        measurements_fields[measurement_name] = field_names
+    for (measurement_name, _), fields in fields_result.items():
+        measurements_fields[measurement_name] = [field['fieldKey'] for field in fields]
 
     return measurements_fields
 
-def get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt, output_func):
+def get_counts_for_fields(client, measurement, fields, bind_params, output_func, verbose=False, cancel_event=None):
     """
-    Count non-null entries for a specific field in a measurement for a given vehicle and time period.
+    Count non-null entries for all fields of a measurement for a given vehicle and time period.
+    Up to MAX_FIELDS_PER_QUERY fields are counted by one query, each COUNT aliased "c_<index>"
+    so the returned columns can be mapped back to the field names.
+    bind_params holds the vehicle_id, start and end (nanoseconds since the epoch) of COUNT_QUERY.
+    The queries and the per-field counts are only echoed to output_func when verbose is set.
+    No further queries are sent once cancel_event is set, leaving the remaining fields out.
+    Returns a dictionary of field -> count (0 when the field has no data).
     """
-    query = f'''
-    SELECT COUNT("{field}") 
-    FROM "{measurement}"
-    WHERE vehicle_id='{vehicle_id}' 
-      AND time >= '{start_dt.isoformat()}'
-      AND time < '{end_dt.isoformat()}'
-    '''
-    output_func(f"Executing query:\n{query}\n")
-    try:
-        result = client.query(query)
-        points = list(result.get_points())
-    except Exception as e:
-        output_func(f"Error executing query for {measurement}.{field}: {e}\n")
-        return 0
+    counts = {}
+    for offset in range(0, len(fields), MAX_FIELDS_PER_QUERY):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        chunk = fields[offset:offset + MAX_FIELDS_PER_QUERY]
+        aggregates = ", ".join(f'COUNT("{field}") AS "c_{i}"' for i, field in enumerate(chunk))
+        query = COUNT_QUERY.format(aggregates=aggregates, measurement=measurement)
+        if verbose:
+            output_func(f"Executing query:\n{query}\n")
+        try:
+            result = client.query(query, bind_params=bind_params, epoch='ns')
+            points = list(result.get_points())
+        except Exception as e:
+            output_func(f"Error executing query for {measurement}: {e}\n")
+            points = []
 
-    if points:
-        for key in points[0]:
-            if key.startswith("count"):
-                count_val = points[0][key]
+        for i, field in enumerate(chunk):
+            count_val = (points[0].get(f"c_{i}") or 0) if points else 0
+            if verbose:
                 output_func(f"Count for {measurement}.{field}: {count_val}\n")
-                return count_val
-    return 0
+            counts[field] = count_val
+    return counts
 
-def run_queries(params, output_func):
+def run_queries(params, output_func, client=None, cancel_event=None):
     """
     Connects to InfluxDB, loads measurement fields (from CSV or dynamically), performs queries,
     and then saves the results to a CSV file.
+    An existing client can be passed in to reuse its open connections.
+    Setting cancel_event stops the run after the queries in flight; the rows written so far are kept.
     """
-    try:
-        client = InfluxDBClient(
-            host=params['host'],
-            port=int(params['port']),
-            username=params['username'],
-            password=params['password'],
-            database=params['database']
-        )
-        output_func("Connected to InfluxDB.\n")
-    except Exception as e:
-        output_func(f"Failed to connect to InfluxDB: {e}\n")
-        return
+    import pandas as pd
+    import pytz
+
+    if cancel_event is None:
+        cancel_event = threading.Event()
+
+    if client is None:
+        try:
+            client = create_client(params)
+            output_func("Connected to InfluxDB.\n")
+        except Exception as e:
+            output_func(f"Failed to connect to InfluxDB: {e}\n")
+            return
 
     try:
         local_tz = pytz.timezone(params['timezone'])
         start_dt = pd.Timestamp(f"{params['start_date']} {params['start_time']}").tz_localize(local_tz)
         end_dt = pd.Timestamp(f"{params['end_date']} {params['end_time']}").tz_localize(local_tz)
+        # Query bounds as nanoseconds since the epoch, the unit InfluxDB stores.
+        start_ns, end_ns = start_dt.value, end_dt.value
     except Exception as e:
         output_func(f"Error creating timestamps: {e}\n")
         return
@@ -144,33 +200,58 @@ def run_queries(params, output_func):
             output_func(f"Error fetching measurements/fields: {e}\n")
             return
 
-    results_list = []
-    for measurement, fields in measurements_fields.items():
-        output_func(f"\nProcessing Measurement: {measurement}\n")
-        if not fields:
-            output_func("  No fields found for this measurement.\n")
-            continue
-        for field in fields:
-            count_value = get_count_for_field(client, measurement, field, vehicle_id, start_dt, end_dt, output_func)
-            combined_key = f"{measurement}.count_{field}"
-            results_list.append({
-                'Measurement_Field': combined_key,
-                'Count': count_value
-            })
-
-    if results_list:
-        df = pd.DataFrame(results_list)
-        csv_output = (f"measurements_field_counts_{vehicle_id}_"
-                      f"{params['start_date'].replace('-', '')}_"
-                      f"{params['start_time'].replace(':', '')}_to_"
-                      f"{params['end_time'].replace(':', '')}.csv")
-        try:
-            df.to_csv(csv_output, index=False)
-            output_func(f"\nData saved to {csv_output}\n")
-        except Exception as e:
-            output_func(f"Error saving CSV file: {e}\n")
-    else:
+    verbose = params.get('verbose', False)
+    # The WHERE clause is the same for every query, so its values are bound once.
+    bind_params = {'vehicle_id': vehicle_id, 'start': start_ns, 'end': end_ns}
+
+    if not any(measurements_fields.values()):
         output_func("No data to save.\n")
+        return
+
+    # Write the rows as the counts arrive, so partial results survive an interrupted run
+    # and nothing is buffered for the whole schema.
+    csv_output = (f"measurements_field_counts_{vehicle_id}_"
+                  f"{params['start_date'].replace('-', '')}_"
+                  f"{params['start_time'].replace(':', '')}_to_"
+                  f"{params['end_time'].replace(':', '')}.csv")
+    try:
+        with open(csv_output, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['Measurement_Field', 'Count'])
+
+            # Query the measurements in parallel; the results are written in measurement order,
+            # with one progress line per measurement.
+            cancelled = False
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = []
+                for measurement, fields in measurements_fields.items():
+                    if verbose:
+                        output_func(f"\nProcessing Measurement: {measurement}\n")
+                    if not fields:
+                        output_func(f"No fields found for measurement: {measurement}\n")
+                        continue
+                    futures.append((measurement, fields, executor.submit(
+                        get_counts_for_fields, client, measurement, fields, bind_params, output_func, verbose,
+                        cancel_event)))
+
+                for done, (measurement, fields, future) in enumerate(futures, 1):
+                    counts = future.result()
+                    if cancel_event.is_set():
+                        # Drop the measurements that have not started; the running ones stop
+                        # before their next query.
+                        for _, _, pending in futures:
+                            pending.cancel()
+                        output_func(f"\nQuery cancelled after {done - 1}/{len(futures)} measurements.\n")
+                        cancelled = True
+                        break
+                    writer.writerows((f"{measurement}.count_{field}", counts[field]) for field in fields)
+                    output_func(f"Processed {done}/{len(futures)} measurements\n")
+        if cancelled:
+            output_func(f"Partial results saved to {csv_output}\n")
+        else:
+            output_func(f"\nData saved to {csv_output}\n")
+    except OSError as e:
+        output_func(f"Error saving CSV file: {e}\n")
 
 class InfluxDBQueryFrame(tk.Frame):
     """
@@ -178,7 +259,17 @@ class InfluxDBQueryFrame(tk.Frame):
     """
     def __init__(self, parent):
         super().__init__(parent)
+        # Output produced by the query threads, written to the output box by drain_log.
+        self.log_queue = queue.Queue()
+        # InfluxDB client reused across runs while the connection parameters are unchanged.
+        self.client = None
+        self.client_key = None
+        self.client_lock = threading.Lock()
+        atexit.register(self.close_client)
+        # Set by the Cancel button to stop the running query.
+        self.cancel_event = threading.Event()
         self.create_widgets()
+        self.after(LOG_DRAIN_INTERVAL_MS, self.drain_log)
 
     def create_widgets(self):
         # --- InfluxDB Connection Parameters ---
@@ -227,16 +318,22 @@ class InfluxDBQueryFrame(tk.Frame):
         frame_csv.grid(column=0, row=2, padx=10, pady=5, sticky="W")
         self.use_csv_var = tk.BooleanVar(value=True)
         self.csv_filename_var = tk.StringVar(value="")
+        self.verbose_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(frame_csv, text="Use CSV for Measurement Fields", variable=self.use_csv_var).grid(column=0, row=0, sticky="W", padx=5, pady=2)
         ttk.Label(frame_csv, text="CSV Filename:").grid(column=0, row=1, sticky="W", padx=5)
         csv_filename_entry = ttk.Entry(frame_csv, width=40, textvariable=self.csv_filename_var)
         csv_filename_entry.grid(column=1, row=1, padx=5, pady=2)
         select_csv_btn = ttk.Button(frame_csv, text="Select File", command=self.select_csv_file)
         select_csv_btn.grid(column=2, row=1, padx=5, pady=2)
-
-        # --- Run Button and Output Display ---
-        self.run_button = ttk.Button(self, text="Run Query", command=self.on_run_query)
-        self.run_button.grid(column=0, row=3, padx=10, pady=5, sticky="W")
+        ttk.Checkbutton(frame_csv, text="Show executed queries", variable=self.verbose_var).grid(column=0, row=2, sticky="W", padx=5, pady=2)
+
+        # --- Run/Cancel Buttons and Output Display ---
+        frame_buttons = ttk.Frame(self)
+        frame_buttons.grid(column=0, row=3, padx=10, pady=5, sticky="W")
+        self.run_button = ttk.Button(frame_buttons, text="Run Query", command=self.on_run_query)
+        self.run_button.grid(column=0, row=0)
+        self.cancel_button = ttk.Button(frame_buttons, text="Cancel", command=self.cancel_event.set, state=tk.DISABLED)
+        self.cancel_button.grid(column=1, row=0, padx=(5, 0))
         self.output_text = scrolledtext.ScrolledText(self, width=90, height=15, wrap=tk.WORD)
         self.output_text.grid(column=0, row=4, padx=10, pady=5)
 
@@ -249,12 +346,35 @@ class InfluxDBQueryFrame(tk.Frame):
             self.csv_filename_var.set(filename)
 
     def append_output(self, message):
-        self.output_text.insert(tk.END, message)
-        self.output_text.see(tk.END)
+        # Called from the query worker threads; drain_log writes the messages on the Tk main loop.
+        self.log_queue.put(message)
+
+    def drain_log(self):
+        """ Writes the queued output messages to the output box in one insert, then reschedules itself. """
+        messages = []
+        finished = False
+        try:
+            while len(messages) < LOG_DRAIN_BATCH:
+                message = self.log_queue.get_nowait()
+                if message is RUN_FINISHED:
+                    finished = True
+                    break
+                messages.append(message)
+        except queue.Empty:
+            pass
+        if messages:
+            self.output_text.insert(tk.END, ''.join(messages))
+            self.output_text.see(tk.END)
+        if finished:
+            self.run_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+        self.after(LOG_DRAIN_INTERVAL_MS, self.drain_log)
 
     def on_run_query(self):
         self.output_text.delete(1.0, tk.END)
         self.run_button.config(state=tk.DISABLED)
+        self.cancel_event.clear()
+        self.cancel_button.config(state=tk.NORMAL)
         params = {
             'host': self.host_var.get(),
             'port': self.port_var.get(),
@@ -268,17 +388,36 @@ class InfluxDBQueryFrame(tk.Frame):
             'end_time': self.end_time_var.get(),
             'timezone': self.timezone_var.get(),
             'use_csv': self.use_csv_var.get(),
-            'csv_filename': self.csv_filename_var.get()
+            'csv_filename': self.csv_filename_var.get(),
+            'verbose': self.verbose_var.get()
         }
         threading.Thread(target=self.run_query_thread, args=(params,)).start()
 
+    def get_client(self, params):
+        """Returns the cached InfluxDB client, creating a new one if the connection parameters changed."""
+        client_key = tuple(params[key] for key in ('host', 'port', 'username', 'password', 'database'))
+        with self.client_lock:
+            if self.client is None or self.client_key != client_key:
+                if self.client is not None:
+                    self.client.close()
+                self.client = create_client(params)
+                self.client_key = client_key
+            return self.client
+
+    def close_client(self):
+        with self.client_lock:
+            if self.client is not None:
+                self.client.close()
+                self.client = None
+
     def run_query_thread(self, params):
         try:
-            run_queries(params, self.append_output)
+            run_queries(params, self.append_output, self.get_client(params), self.cancel_event)
         except Exception as e:
             self.append_output(f"Error during query execution: {e}\n")
         finally:
-            self.run_button.config(state=tk.NORMAL)
+            # The worker thread never touches Tk; drain_log re-enables the buttons once it reaches this.
+            self.log_queue.put(RUN_FINISHED)
 
 # =======================================================
 # Data Processor / Metadata Functionality (Tab 2)
@@ -301,6 +440,10 @@ missing_input_label = None
 missing_valid_label = None
 
 TEMPLATE_FILE = "t4.csv"
+# (modification time, metadata dict) of the last parsed TEMPLATE_FILE
+template_cache = None
+# Number of input CSV rows read and processed at a time.
+INPUT_CHUNK_ROWS = 100_000
 metadata_fields = [
     "Uploaded By", "Test Data", "Test Time", "Test Conducted", "Test Device",
     "Boson App Version", "VT-Box Version", "VCU Hardware Version", "VCU Software Version",
@@ -336,15 +479,7 @@ def get_save_path(prompt):
         return None
     return save_path
 
-def check_valid_file(row, valid_data):
-    if row['InfluxDB Field Name'] in valid_data['InfluxDB Field Name'].values:
-        if pd.isnull(row['Value']):
-            return 'No'
-        return 'Yes'
-    else:
-        return 'No'
-
-def validate_files(input_data, valid_data):
+def validate_files(valid_data):
     required_columns = ['InfluxDB Field Name', 'CAN Dictionary MAP', 'Time ']
     if not all(column in valid_data.columns for column in required_columns):
         missing = ', '.join(set(required_columns) - set(valid_data.columns))
@@ -352,29 +487,127 @@ def validate_files(input_data, valid_data):
     return valid_data.drop_duplicates(subset='InfluxDB Field Name')
 
 def map_values(input_data, valid_data):
-    can_dict_map = valid_data.set_index('InfluxDB Field Name')['CAN Dictionary MAP'].to_dict()
-    time_map = valid_data.set_index('InfluxDB Field Name')['Time '].to_dict()
-    input_data['CAN Dictionary MAP'] = input_data['InfluxDB Field Name'].map(can_dict_map)
-    input_data['Time '] = input_data['InfluxDB Field Name'].map(time_map)
+    """
+    Returns input_data with the 'CAN Dictionary MAP' and 'Time ' columns of the matching
+    valid file rows, joined on 'InfluxDB Field Name' (valid_data holds one row per field).
+    """
+    mapped_columns = ['CAN Dictionary MAP', 'Time ']
+    return input_data.drop(columns=mapped_columns, errors='ignore').merge(
+        valid_data[['InfluxDB Field Name'] + mapped_columns], on='InfluxDB Field Name', how='left')
 
 def calculate_expected_count(input_data, user_hours):
-    input_data['Expected Count'] = input_data.apply(
-        lambda row: (60000 / row['Time ']) * 60 * user_hours if pd.notnull(row['Time ']) and row['Time '] > 0 else None,
-        axis=1
-    )
+    # 'Time ' is the logging interval in ms; rows without a positive interval get NaN.
+    # NaN propagates through the loss columns, so no per-row null checks are needed.
+    import numpy as np
+
+    # np.divide only writes where the mask holds, so the other entries keep their NaN fill.
+    t = input_data['Time '].to_numpy(dtype=float)
+    expected = np.full(t.shape, np.nan)
+    np.divide(60000.0, t, out=expected, where=t > 0)
+    expected *= 60 * user_hours
+    input_data['Expected Count'] = expected
     if 'Value' in input_data.columns:
-        input_data['Loss'] = input_data['Expected Count'] - input_data['Value']
-        input_data['Percentage Loss'] = input_data.apply(
-            lambda row: (row['Loss'] / row['Expected Count'] * 100)
-            if pd.notnull(row['Loss']) and row['Expected Count'] > 0 else None,
-            axis=1
-        )
+        loss = expected - input_data['Value'].to_numpy(dtype=float)
+        input_data['Loss'] = loss
+        percentage = np.full(t.shape, np.nan)
+        np.divide(loss, expected, out=percentage, where=expected > 0)
+        percentage *= 100
+        input_data['Percentage Loss'] = percentage
+
+def open_excel_writer(path):
+    """
+    Returns a pandas ExcelWriter for the output workbook. With xlsxwriter installed, rows are
+    written in constant-memory mode and flushed to disk as each row is completed; otherwise
+    openpyxl builds the whole workbook in memory.
+    """
+    import pandas as pd
+
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return pd.ExcelWriter(path, engine='openpyxl')
+    return pd.ExcelWriter(path, engine='xlsxwriter', engine_kwargs={'options': {'constant_memory': True}})
+
+def write_sheet(writer, df, sheet_name, startrow=0, header=True):
+    """
+    Write df to a sheet of the output workbook from startrow on and return the next free row.
+    DataFrame.to_excel writes cells column by column, which constant-memory mode cannot take
+    (rows are flushed once the next row is started), so with xlsxwriter the rows are written
+    one at a time, with empty cells for missing values.
+    """
+    if writer.engine != 'xlsxwriter':
+        df.to_excel(writer, sheet_name=sheet_name, index=False, header=header, startrow=startrow)
+        return startrow + len(df) + header
+
+    worksheet = writer.sheets.get(sheet_name) or writer.book.add_worksheet(sheet_name)
+    if header:
+        worksheet.write_row(startrow, 0, list(df.columns))
+        startrow += 1
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        worksheet.write_row(startrow, 0, row)
+        startrow += 1
+    return startrow
+
+def process_input_chunks(input_path, valid_data, user_hours):
+    """
+    Read the input data file and yield it as processed DataFrames of up to INPUT_CHUNK_ROWS rows,
+    so only one chunk of a large CSV file is held in memory at a time.
+    Excel files are read in one piece and yielded as a single chunk.
+    With pyarrow installed the Metric column is read as Arrow-backed strings.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # read_csv infers the dtypes of every chunk separately, so Value is fixed to float64: otherwise
+    # a chunk without empty cells reads it as int64 and the chunks would be written inconsistently.
+    dtype = {'Metric': str, 'Value': 'float64'}
+    try:
+        import pyarrow  # noqa: F401
+        # One contiguous UTF-8 buffer per chunk instead of a Python str per cell; the split,
+        # removeprefix and isin below then run on Arrow compute kernels.
+        dtype['Metric'] = 'string[pyarrow]'
+    except ImportError:
+        pass
+
+    if input_path.endswith('.csv'):
+        chunks = pd.read_csv(input_path, chunksize=INPUT_CHUNK_ROWS, dtype=dtype)
+    else:
+        chunks = [pd.read_excel(input_path, dtype=dtype)]
+    # Built once per file and shared by every chunk: one hash lookup per input row.
+    valid_names = frozenset(valid_data['InfluxDB Field Name'])
+
+    for input_data in chunks:
+        if 'Metric' not in input_data.columns:
+            raise ValueError("The input file does not contain a 'Metric' column.")
+
+        metric_parts = input_data['Metric'].str.split('.', n=1, expand=True)
+        if metric_parts.shape[1] < 2 or metric_parts[1].isnull().any():
+            raise ValueError("Some 'Metric' entries do not contain a '.' to split.")
+        input_data['Measurement'] = metric_parts[0]
+        input_data['InfluxDB Field Name'] = metric_parts[1].str.removeprefix('count_')
+        is_valid = input_data['InfluxDB Field Name'].isin(valid_names) & input_data['Value'].notna()
+        input_data['Available in Valid File?'] = np.where(is_valid, 'Yes', 'No')
+
+        input_data = map_values(input_data, valid_data)
+        calculate_expected_count(input_data, user_hours)
+        yield input_data
+
+def read_metadata_template():
+    """
+    Returns the "Meta Data" -> "Meta Value" mapping of TEMPLATE_FILE.
+    The file is parsed again only when its modification time has changed.
+    """
+    global template_cache
+    mtime = os.path.getmtime(TEMPLATE_FILE)
+    if template_cache is None or template_cache[0] != mtime:
+        with open(TEMPLATE_FILE, newline='') as f:
+            template_cache = (mtime, {row["Meta Data"]: row["Meta Value"] for row in csv.DictReader(f)})
+    return template_cache[1]
 
 def load_metadata_from_csv():
     global metadata_entries, comments_text
     try:
-        metadata_df = pd.read_csv(TEMPLATE_FILE)
-        metadata_dict = metadata_df.set_index("Meta Data")["Meta Value"].to_dict()
+        metadata_dict = read_metadata_template()
         for field, entry in metadata_entries.items():
             if field in ["Missing in Valid File", "Missing in Input Data"]:
                 continue
@@ -406,6 +639,8 @@ def reset_form():
 
 def process_file():
     global input_file, valid_file, save_file, user_hours
+    import pandas as pd
+
     try:
         if not input_file or not valid_file or not save_file:
             messagebox.showerror("Error", "Please select all required files.")
@@ -419,26 +654,8 @@ def process_file():
             messagebox.showerror("Error", "Please enter a valid number of hours.")
             return
 
-        input_data = pd.read_csv(input_file) if input_file.endswith('.csv') else pd.read_excel(input_file)
         valid_data = pd.read_csv(valid_file) if valid_file.endswith('.csv') else pd.read_excel(valid_file)
-        valid_data = validate_files(input_data, valid_data)
-
-        if 'Metric' not in input_data.columns:
-            raise ValueError("The input file does not contain a 'Metric' column.")
-        
-        input_data[['Measurement', 'InfluxDB Field Name']] = input_data['Metric'].str.split('.', n=1, expand=True)
-        if input_data['InfluxDB Field Name'].isnull().any():
-            raise ValueError("Some 'Metric' entries do not contain a '.' to split.")
-        input_data['InfluxDB Field Name'] = input_data['InfluxDB Field Name'].str.replace('count_', '', regex=False)
-        input_data['Available in Valid File?'] = input_data.apply(lambda row: check_valid_file(row, valid_data), axis=1)
-
-        missing_feaids_input_missing_valid = input_data[input_data['Available in Valid File?'] == 'No']['InfluxDB Field Name'].unique().tolist()
-        missing_feaids_valid_missing_input = valid_data[~valid_data['InfluxDB Field Name'].isin(input_data['InfluxDB Field Name'])]['InfluxDB Field Name'].unique().tolist()
-
-        map_values(input_data, valid_data)
-        calculate_expected_count(input_data, user_hours)
-        missing_input_label.config(text=", ".join(map(str, missing_feaids_input_missing_valid)) if missing_feaids_input_missing_valid else "None")
-        missing_valid_label.config(text=", ".join(map(str, missing_feaids_valid_missing_input)) if missing_feaids_valid_missing_input else "None")
+        valid_data = validate_files(valid_data)
 
         metadata = {
             "Meta Data": ["Upload Time"] + metadata_fields + ["Comments"],
@@ -452,18 +669,41 @@ def process_file():
         }
         metadata_df = pd.DataFrame(metadata)
 
+        # The processed chunks are written as they are produced; the fields missing on either
+        # side are collected along the way (in order of first appearance) and written last.
+        missing_in_valid = {}
+        input_fields = set()
+
+        def processed_chunks():
+            for input_data in process_input_chunks(input_file, valid_data, user_hours):
+                missing_in_valid.update(dict.fromkeys(
+                    input_data.loc[input_data['Available in Valid File?'] == 'No', 'InfluxDB Field Name']))
+                input_fields.update(input_data['InfluxDB Field Name'])
+                yield input_data
+
+        def missing_lists():
+            missing_feaids_input_missing_valid = list(missing_in_valid)
+            missing_feaids_valid_missing_input = valid_data[~valid_data['InfluxDB Field Name'].isin(input_fields)]['InfluxDB Field Name'].unique().tolist()
+            return missing_feaids_input_missing_valid, missing_feaids_valid_missing_input
+
         if save_file.endswith(".xlsx"):
-            with pd.ExcelWriter(save_file, engine='openpyxl') as writer:
-                metadata_df.to_excel(writer, sheet_name='Metadata', index=False)
-                input_data.to_excel(writer, sheet_name='Processed Data', index=False)
-                pd.DataFrame({"Missing in Valid File": missing_feaids_input_missing_valid}).to_excel(writer, sheet_name='Missing in Valid File', index=False)
-                pd.DataFrame({"Missing in Input Data": missing_feaids_valid_missing_input}).to_excel(writer, sheet_name='Missing in Input Data', index=False)
+            # Each sheet is written top to bottom, as constant-memory mode requires.
+            with open_excel_writer(save_file) as writer:
+                write_sheet(writer, metadata_df, 'Metadata')
+                startrow = 0
+                for input_data in processed_chunks():
+                    startrow = write_sheet(writer, input_data, 'Processed Data', startrow, header=startrow == 0)
+                missing_feaids_input_missing_valid, missing_feaids_valid_missing_input = missing_lists()
+                write_sheet(writer, pd.DataFrame({"Missing in Valid File": missing_feaids_input_missing_valid}), 'Missing in Valid File')
+                write_sheet(writer, pd.DataFrame({"Missing in Input Data": missing_feaids_valid_missing_input}), 'Missing in Input Data')
         elif save_file.endswith(".csv"):
             with open(save_file, 'w', newline='') as f:
                 f.write("=== Metadata ===\n")
                 metadata_df.to_csv(f, index=False)
                 f.write('\n=== Processed Data ===\n')
-                input_data.to_csv(f, index=False, header=True, lineterminator="\n")
+                for i, input_data in enumerate(processed_chunks()):
+                    input_data.to_csv(f, index=False, header=i == 0, lineterminator="\n")
+                missing_feaids_input_missing_valid, missing_feaids_valid_missing_input = missing_lists()
                 f.write('\n=== Missing in Valid File ===\n')
                 pd.DataFrame({"Missing in Valid File": missing_feaids_input_missing_valid}).to_csv(f, index=False, header=True, lineterminator="\n")
                 f.write('\n=== Missing in Input Data ===\n')
@@ -471,6 +711,9 @@ def process_file():
         else:
             raise ValueError("Unsupported save file format. Use '.xlsx' or '.csv'.")
 
+        missing_input_label.config(text=", ".join(map(str, missing_feaids_input_missing_valid)) if missing_feaids_input_missing_valid else "None")
+        missing_valid_label.config(text=", ".join(map(str, missing_feaids_valid_missing_input)) if missing_feaids_valid_missing_input else "None")
+
         messagebox.showinfo("Success", f"Updated file saved as {save_file}")
         open_saved_file(save_file)
         reset_form()
@@ -480,6 +723,8 @@ def process_file():
         print(e)
 
 def save_metadata_to_csv():
+    import pandas as pd
+
     try:
         metadata = {
             "Meta Data": metadata_fields[:-2] + ["Comments"],
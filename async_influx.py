@@ -0,0 +1,59 @@
+import asyncio
+import aiohttp
+
+# ==================================================
+# Concurrent InfluxDB HTTP queries with aiohttp
+# ==================================================
+
+# Maximum number of queries in flight at once.
+DEFAULT_CONNECTION_LIMIT = 64
+
+# Number of times a query is retried after a server error or a dropped connection.
+MAX_RETRIES = 3
+
+# HTTP status codes of transient server errors that are worth retrying.
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# Delay before the first retry in seconds, doubled on every further attempt.
+RETRY_BACKOFF = 0.2
+
+async def query(session, url, database, sql):
+    """
+    Run one InfluxQL statement against the /query endpoint.
+    Returns the statement result in the same shape as ResultSet.raw.
+    Server errors and connection failures are retried up to MAX_RETRIES times with backoff.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with session.get(url, params={'db': database, 'q': sql}) as response:
+                response.raise_for_status()
+                payload = await response.json()
+            return payload['results'][0]
+        except aiohttp.ClientResponseError as e:
+            if e.status not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                raise
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+async def gather_queries(params, queries, limit):
+    """
+    Run all queries concurrently over one session, holding at most `limit` connections.
+    """
+    url = f"http://{params['host']}:{int(params['port'])}/query"
+    auth = aiohttp.BasicAuth(params['username'], params['password']) if params['username'] else None
+    connector = aiohttp.TCPConnector(limit=limit)
+    async with aiohttp.ClientSession(connector=connector, auth=auth) as session:
+        return await asyncio.gather(
+            *[query(session, url, params['database'], sql) for sql in queries],
+            return_exceptions=True
+        )
+
+def run_queries(params, queries, limit=DEFAULT_CONNECTION_LIMIT):
+    """
+    Run the queries concurrently on a new event loop and wait for all of them.
+    Returns one raw result (or the raised exception) per query, in query order.
+    Must be called from a worker thread, never from the Tk main loop.
+    """
+    return asyncio.run(gather_queries(params, queries, limit))
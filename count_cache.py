@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import threading
+
+from schema_cache import CACHE_DIR
+
+# ==================================================
+# On-disk cache of hourly field counts per vehicle
+# ==================================================
+
+CACHE_FILE = os.path.join(CACHE_DIR, "count_cache.sqlite")
+HOUR_SECONDS = 3600
+
+class CountCache:
+    """
+    SQLite store of per-hour field counts, keyed by data source (host/database),
+    vehicle and measurement. covered_hours records which hours were fully counted,
+    so hours without any data are not queried again.
+    The connection is shared by the query worker threads behind a lock.
+    """
+    def __init__(self, path=CACHE_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS hourly_counts("
+                "source TEXT, vehicle TEXT, measurement TEXT, field TEXT, hour_start INTEGER, cnt INTEGER, "
+                "PRIMARY KEY(source, vehicle, measurement, field, hour_start))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS covered_hours("
+                "source TEXT, vehicle TEXT, measurement TEXT, hour_start INTEGER, "
+                "PRIMARY KEY(source, vehicle, measurement, hour_start))"
+            )
+
+    def missing_hours(self, source, vehicle, measurement, first_hour, end_hour):
+        """
+        Returns the start (epoch seconds) of every hour in [first_hour, end_hour) not yet counted.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT hour_start FROM covered_hours WHERE source=? AND vehicle=? AND measurement=? "
+                "AND hour_start >= ? AND hour_start < ?",
+                (source, vehicle, measurement, first_hour, end_hour)
+            ).fetchall()
+        covered = {row[0] for row in rows}
+        return [hour for hour in range(first_hour, end_hour, HOUR_SECONDS) if hour not in covered]
+
+    def store(self, source, vehicle, measurement, hours, hourly_counts):
+        """
+        Save the counts of the given hours, where hourly_counts maps hour starts to {field: count}.
+        """
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO hourly_counts VALUES (?, ?, ?, ?, ?, ?)",
+                [(source, vehicle, measurement, field, hour, cnt)
+                 for hour, counts in hourly_counts.items() for field, cnt in counts.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO covered_hours VALUES (?, ?, ?, ?)",
+                [(source, vehicle, measurement, hour) for hour in hours]
+            )
+
+    def sum_counts(self, source, vehicle, measurement, first_hour, end_hour):
+        """
+        Returns {field: total count} over the cached hours in [first_hour, end_hour).
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT field, SUM(cnt) FROM hourly_counts WHERE source=? AND vehicle=? AND measurement=? "
+                "AND hour_start >= ? AND hour_start < ? GROUP BY field",
+                (source, vehicle, measurement, first_hour, end_hour)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,39 @@
+import os
+import json
+import time
+
+# ==================================================
+# On-disk cache for measurement -> fields schemas
+# ==================================================
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".influx_grab_cache")
+DEFAULT_TTL_MINUTES = 60
+
+def cache_path(host, database):
+    """
+    Returns the path of the cache file for the given host and database.
+    """
+    safe_name = f"{host}_{database}".replace(os.sep, "_").replace(":", "_")
+    return os.path.join(CACHE_DIR, f"{safe_name}.json")
+
+def load_cached_schema(host, database, ttl_minutes=DEFAULT_TTL_MINUTES):
+    """
+    Load the cached measurement fields for the given host and database.
+    Returns the dictionary, or None if there is no cache file or it is older than the TTL.
+    """
+    path = cache_path(host, database)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl_minutes * 60:
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_cached_schema(host, database, measurements_fields):
+    """
+    Save the measurement fields for the given host and database to the cache.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_path(host, database), 'w') as f:
+        json.dump(measurements_fields, f)
@@ -31,7 +31,7 @@ root.destroy()
 # Define build options
 # --------------------------------------------------
 build_exe_options = {
-    'packages': ['numpy', 'pandas', 'openpyxl', "influxdb"],
+    'packages': ['numpy', 'pandas', 'openpyxl', "influxdb", "tzdata"],
     'include_files': [
         'measurements_fields.txt',
         'Influx-DB.ico',  # Include your icon file